@@ -1,44 +1,154 @@
 import customtkinter as ctk
+import tkinter as tk
 from datetime import date, timedelta
 
+import levels
+
+# --- Heatmap ---
+HEATMAP_RANGES = {"28 days": 28, "90 days": 90, "1 year": 365, "All time": None}
+# Colour per completion count; anything above the last index uses the last colour
+HEATMAP_COLORS = ["#2d2d2d", "#0e4429", "#0e4429", "#006d32", "#006d32", "#39d353"]
+HEATMAP_BG = "#1a1a1a"
+TREND_TABLE_ROWS = 10  # Trends page lists the best and worst N habits (by 30-day rate), not all of them
+
+def heatmap_color(count):
+    return HEATMAP_COLORS[min(count, len(HEATMAP_COLORS) - 1)]
+
+class Heatmap(ctk.CTkFrame):
+    """GitHub-style heatmap drawn on one canvas: a column per week, a row per weekday.
+
+    Cell items are created once and recoloured/moved on redraw; extra items are
+    hidden rather than deleted, so switching ranges never rebuilds widgets.
+    """
+    def __init__(self, parent, worker, data, range_name="28 days"):
+        super().__init__(parent, fg_color=HEATMAP_BG, corner_radius=15)
+        self.worker = worker
+        self.cells = []      # rectangle item ids, reused across redraws
+        self.labels = []     # day-number text items (only shown on large cells)
+        self.days = []       # date of each visible cell, by index
+        self.counts = []
+        self.first = None
+        self.cell = self.step = 0
+
+        self.range_var = ctk.StringVar(value=range_name)
+        ctk.CTkSegmentedButton(self, values=list(HEATMAP_RANGES), variable=self.range_var,
+                               command=self.select_range).pack(anchor="e", padx=15, pady=(15, 0))
+        self.canvas = tk.Canvas(self, bg=HEATMAP_BG, highlightthickness=0, height=0)
+        self.canvas.pack(fill="x", padx=15, pady=15)
+        self.xscroll = ctk.CTkScrollbar(self, orientation="horizontal", command=self.canvas.xview)
+        self.canvas.configure(xscrollcommand=self.xscroll.set)
+
+        self.tip_bg = self.canvas.create_rectangle(0, 0, 0, 0, fill="#333333", outline="#555555", state="hidden")
+        self.tip = self.canvas.create_text(0, 0, anchor="nw", fill="white", font=("Arial", 10), state="hidden")
+        self.canvas.bind("<Motion>", self.on_hover)
+        self.canvas.bind("<Leave>", lambda e: self.hide_tip())
+
+        self.draw(data)
+
+    def select_range(self, range_name):
+        days = HEATMAP_RANGES[range_name]
+        start = date.today() - timedelta(days=days - 1) if days else None
+        self.worker.call("get_activity_data", start, date.today(), on_done=self.draw)
+
+    def draw(self, data):
+        if not self.winfo_exists(): return
+        today = date.today()
+        days = HEATMAP_RANGES[self.range_var.get()]
+        if days: start = today - timedelta(days=days - 1)
+        else: start = min((date.fromisoformat(d) for d in data), default=today)
+        n = (today - start).days + 1
+        # Bigger cells for short ranges, GitHub-sized ones for a year or more
+        self.cell = 36 if n <= 31 else 20 if n <= 120 else 12
+        self.step = self.cell + (4 if self.cell > 20 else 3)
+        show_labels = self.cell >= 20
+        self.first = start - timedelta(days=start.weekday())  # Monday of the first column
+
+        while len(self.cells) < n:
+            self.cells.append(self.canvas.create_rectangle(0, 0, 0, 0, width=0))
+            self.labels.append(self.canvas.create_text(0, 0, font=("Arial", 10, "bold")))
+        self.days = [start + timedelta(days=i) for i in range(n)]
+        self.counts = [data.get(str(d), 0) for d in self.days]
+        for i, (day, count) in enumerate(zip(self.days, self.counts)):
+            col, row = divmod((day - self.first).days, 7)
+            x, y = col * self.step, row * self.step
+            self.canvas.coords(self.cells[i], x, y, x + self.cell, y + self.cell)
+            self.canvas.itemconfigure(self.cells[i], fill=heatmap_color(count), state="normal")
+            if show_labels:
+                self.canvas.coords(self.labels[i], x + self.cell / 2, y + self.cell / 2)
+                self.canvas.itemconfigure(self.labels[i], text=str(day.day), state="normal",
+                                          fill="#e0e0e0" if count > 0 else "#555555")
+            else:
+                self.canvas.itemconfigure(self.labels[i], state="hidden")
+        for i in range(n, len(self.cells)):
+            self.canvas.itemconfigure(self.cells[i], state="hidden")
+            self.canvas.itemconfigure(self.labels[i], state="hidden")
+        self.canvas.tag_raise(self.tip_bg); self.canvas.tag_raise(self.tip)
+
+        width = ((today - self.first).days // 7 + 1) * self.step
+        self.canvas.configure(height=7 * self.step, scrollregion=(0, 0, width, 7 * self.step))
+        self.canvas.xview_moveto(1.0)  # most recent weeks first
+        if width > self.canvas.winfo_width() > 1: self.xscroll.pack(fill="x", padx=15, pady=(0, 10))
+        else: self.xscroll.pack_forget()
+
+    def on_hover(self, event):
+        if not self.step: return
+        x, y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        col, row = int(x // self.step), int(y // self.step)
+        inside = x % self.step < self.cell and y % self.step < self.cell and 0 <= row < 7
+        i = (self.first + timedelta(days=col * 7 + row) - self.days[0]).days if self.days and inside else -1
+        if not 0 <= i < len(self.days): return self.hide_tip()
+        count = self.counts[i]
+        text = f"{self.days[i].strftime('%a %d %b %Y')}: {count} quest{'s' if count != 1 else ''}"
+        self.canvas.itemconfigure(self.tip, text=text, state="normal")
+        self.canvas.coords(self.tip, x + 12, y + 12)
+        x1, y1, x2, y2 = self.canvas.bbox(self.tip)
+        # Keep the tooltip inside the visible area
+        shift = max(0, x2 + 4 - self.canvas.canvasx(self.canvas.winfo_width()))
+        self.canvas.move(self.tip, -shift, 0)
+        self.canvas.coords(self.tip_bg, x1 - 4 - shift, y1 - 2, x2 + 4 - shift, y2 + 2)
+        self.canvas.itemconfigure(self.tip_bg, state="normal")
+
+    def hide_tip(self):
+        self.canvas.itemconfigure(self.tip, state="hidden")
+        self.canvas.itemconfigure(self.tip_bg, state="hidden")
+
+
 class AnalyticsPanel(ctk.CTkFrame):
-    def __init__(self, parent, db):
+    def __init__(self, parent, worker):
         super().__init__(parent, fg_color="transparent")
-        self.db = db
+        self.worker = worker
         
         self.scroll = ctk.CTkScrollableFrame(self, fg_color="transparent")
         self.scroll.pack(fill="both", expand=True)
         
         ctk.CTkLabel(self.scroll, text="Analytics Dashboard", font=("Segoe UI", 32, "bold")).pack(anchor="w", pady=(0, 20))
+        self.loading = ctk.CTkLabel(self.scroll, text="Loading analytics...", text_color="grey")
+        self.loading.pack(pady=20)
+        worker.call("get_analytics_snapshot", on_done=self.build)
+
+    def build(self, snapshot):
+        if not self.winfo_exists(): return
+        self.loading.destroy()
 
         # KPI Cards
-        self.create_kpi_row()
+        self.create_kpi_row(snapshot)
 
         # Heatmap
-        ctk.CTkLabel(self.scroll, text="Consistency Heatmap (30 Days)", font=("Segoe UI", 20, "bold"), text_color="#aaaaaa").pack(anchor="w", pady=(30, 10))
-        self.create_heatmap()
+        ctk.CTkLabel(self.scroll, text="Consistency Heatmap", font=("Segoe UI", 20, "bold"), text_color="#aaaaaa").pack(anchor="w", pady=(30, 10))
+        Heatmap(self.scroll, self.worker, snapshot.activity).pack(fill="x")
 
         # Distribution Chart
         ctk.CTkLabel(self.scroll, text="Habit Distribution (Planned)", font=("Segoe UI", 20, "bold"), text_color="#aaaaaa").pack(anchor="w", pady=(30, 10))
-        self.create_category_distribution()
+        self.create_category_distribution(snapshot.distribution)
 
-    def create_kpi_row(self):
+    def create_kpi_row(self, snapshot):
         kpi_frame = ctk.CTkFrame(self.scroll, fg_color="transparent")
         kpi_frame.pack(fill="x", pady=10)
 
-        total_done = self.db.get_total_completions()
-        total_xp = total_done * 10
-        habits = self.db.get_habits()
-        if habits:
-            done_today = sum(1 for h in habits if h[5] == 1)
-            total_today = len(habits)
-            rate = int((done_today / total_today) * 100)
-        else:
-            rate = 0
-            
+        total_xp = snapshot.total_done * levels.XP_PER_COMPLETION
         self.create_card(kpi_frame, "Total XP", f"{total_xp}", "⚡", "#e67e22")
-        self.create_card(kpi_frame, "Habits Done", f"{total_done}", "✅", "#2CC985")
-        self.create_card(kpi_frame, "Efficiency", f"{rate}%", "📈", "#3498db")
+        self.create_card(kpi_frame, "Habits Done", f"{snapshot.total_done}", "✅", "#2CC985")
+        self.create_card(kpi_frame, "Efficiency", f"{snapshot.efficiency}%", "📈", "#3498db")
 
     def create_card(self, parent, title, value, icon, color):
         card = ctk.CTkFrame(parent, fg_color="#2b2b2b", corner_radius=15, border_width=1, border_color="#444")
@@ -47,43 +157,9 @@ class AnalyticsPanel(ctk.CTkFrame):
         ctk.CTkLabel(card, text=value, font=("Segoe UI", 28, "bold"), text_color=color).pack()
         ctk.CTkLabel(card, text=title, font=("Arial", 12), text_color="#aaaaaa").pack(pady=(0, 15))
 
-    def create_heatmap(self):
-        heatmap_frame = ctk.CTkFrame(self.scroll, fg_color="#1a1a1a", corner_radius=15)
-        heatmap_frame.pack(fill="x", padx=0, pady=0)
-        grid = ctk.CTkFrame(heatmap_frame, fg_color="transparent")
-        grid.pack(pady=15)
-
-        data = self.db.get_activity_data()
-        today = date.today()
-        start_date = today - timedelta(days=27)
-        
-        for i in range(28):
-            target_date = start_date + timedelta(days=i)
-            date_str = str(target_date)
-            count = data.get(date_str, 0)
-            
-            # Determine Color
-            if count == 0: bg = "#2d2d2d"
-            elif count <= 2: bg = "#0e4429"
-            elif count <= 4: bg = "#006d32"
-            else: bg = "#39d353"
-            
-            # Create the Box
-            box = ctk.CTkFrame(grid, width=40, height=40, fg_color=bg, corner_radius=4)
-            box.grid(row=i//7, column=i%7, padx=4, pady=4)
-
-            # --- FIX IS HERE: Add the Day Number Label ---
-            day_num = target_date.day
-            text_col = "#e0e0e0" if count > 0 else "#555555" # Lighter text if active, dark if empty
-            
-            # We use .place() to center the text perfectly inside the box
-            label = ctk.CTkLabel(box, text=str(day_num), text_color=text_col, font=("Arial", 10, "bold"))
-            label.place(relx=0.5, rely=0.5, anchor="center")
-
-    def create_category_distribution(self):
+    def create_category_distribution(self, dist_data):
         chart_frame = ctk.CTkFrame(self.scroll, fg_color="#2b2b2b", corner_radius=15)
         chart_frame.pack(fill="x", pady=(0, 20))
-        dist_data = self.db.get_category_distribution()
         total = sum(d['count'] for d in dist_data.values())
         
         if total == 0:
@@ -104,21 +180,25 @@ class AnalyticsPanel(ctk.CTkFrame):
 
 # --- Performance Page Class ---
 class PerformancePanel(ctk.CTkFrame):
-    def __init__(self, parent, db):
+    def __init__(self, parent, worker):
         super().__init__(parent, fg_color="transparent")
-        self.db = db
+        self.worker = worker
         self.scroll = ctk.CTkScrollableFrame(self, fg_color="transparent")
         self.scroll.pack(fill="both", expand=True)
         
         ctk.CTkLabel(self.scroll, text="Performance Tracker", font=("Segoe UI", 32, "bold")).pack(anchor="w", pady=(0, 20))
         ctk.CTkLabel(self.scroll, text="Completion Rate (Today)", font=("Segoe UI", 20, "bold"), text_color="#aaaaaa").pack(anchor="w", pady=(20, 10))
-        self.create_performance_chart()
+        self.loading = ctk.CTkLabel(self.scroll, text="Loading...", text_color="grey")
+        self.loading.pack(pady=20)
+        # Same cached snapshot as the Analytics page
+        worker.call("get_analytics_snapshot", on_done=lambda snapshot: self.create_performance_chart(snapshot.performance))
 
-    def create_performance_chart(self):
+    def create_performance_chart(self, perf_data):
+        if not self.winfo_exists(): return
+        self.loading.destroy()
         chart_frame = ctk.CTkFrame(self.scroll, fg_color="#2b2b2b", corner_radius=15)
         chart_frame.pack(fill="x", pady=(0, 20))
         
-        perf_data = self.db.get_category_performance()
         if not perf_data:
             ctk.CTkLabel(chart_frame, text="No habits active today.", text_color="grey").pack(pady=20)
             return
@@ -136,4 +216,84 @@ class PerformancePanel(ctk.CTkFrame):
             progress = ctk.CTkProgressBar(row, progress_color=color, fg_color="#444", height=15)
             progress.pack(side="left", fill="x", expand=True, padx=10)
             progress.set(pct)
-            ctk.CTkLabel(row, text=f"{int(pct*100)}%", width=40, anchor="e", text_color="grey").pack(side="left")
\ No newline at end of file
+            ctk.CTkLabel(row, text=f"{int(pct*100)}%", width=40, anchor="e", text_color="grey").pack(side="left")
+
+# --- Trends Page Class ---
+def percent(rate):
+    return "–" if rate is None else f"{int(round(rate * 100))}%"
+
+class TrendsPanel(ctk.CTkFrame):
+    """Long-range rates from trends.py (rolling windows, weekly goals, weekdays)"""
+    def __init__(self, parent, worker):
+        super().__init__(parent, fg_color="transparent")
+        self.worker = worker
+        self.scroll = ctk.CTkScrollableFrame(self, fg_color="transparent")
+        self.scroll.pack(fill="both", expand=True)
+
+        ctk.CTkLabel(self.scroll, text="Trends", font=("Segoe UI", 32, "bold")).pack(anchor="w", pady=(0, 20))
+        self.loading = ctk.CTkLabel(self.scroll, text="Crunching history...", text_color="grey")
+        self.loading.pack(pady=20)
+        worker.submit(self.load_data, on_done=self.build)
+
+    def load_data(self):
+        """Runs on a DB reader thread - no widget access here"""
+        import trends  # NumPy is only loaded once someone opens this page
+        return trends.report(self.worker.db)
+
+    def build(self, data):
+        if not self.winfo_exists(): return
+        self.loading.destroy()
+        from trends import WINDOWS, WEEKDAYS
+        ctk.CTkLabel(self.scroll, text=f"{data['days']} days of history since {data['since']:%d %b %Y}",
+                     text_color="grey").pack(anchor="w")
+
+        # Weekdays
+        ctk.CTkLabel(self.scroll, text="By Weekday", font=("Segoe UI", 20, "bold"), text_color="#aaaaaa").pack(anchor="w", pady=(30, 10))
+        week_frame = ctk.CTkFrame(self.scroll, fg_color="#2b2b2b", corner_radius=15)
+        week_frame.pack(fill="x")
+        for i, (day, rate) in enumerate(zip(WEEKDAYS, data["weekdays"])):
+            week_frame.grid_columnconfigure(i, weight=1)
+            ctk.CTkLabel(week_frame, text=day, text_color="#aaaaaa").grid(row=0, column=i, pady=(15, 0))
+            ctk.CTkLabel(week_frame, text=percent(rate), font=("Segoe UI", 18, "bold"),
+                         text_color=heatmap_color(0 if rate is None else 1 + int(rate * 4.99))).grid(row=1, column=i, pady=(0, 15))
+
+        # Categories
+        ctk.CTkLabel(self.scroll, text="Categories (30 days)", font=("Segoe UI", 20, "bold"), text_color="#aaaaaa").pack(anchor="w", pady=(30, 10))
+        cat_frame = ctk.CTkFrame(self.scroll, fg_color="#2b2b2b", corner_radius=15)
+        cat_frame.pack(fill="x")
+        if not data["categories"]:
+            ctk.CTkLabel(cat_frame, text="No habits yet!", text_color="grey").pack(pady=20)
+        for cat_name, rates in data["categories"].items():
+            row = ctk.CTkFrame(cat_frame, fg_color="transparent")
+            row.pack(fill="x", padx=20, pady=10)
+            ctk.CTkLabel(row, text=cat_name or "—", width=120, anchor="w").pack(side="left")
+            progress = ctk.CTkProgressBar(row, fg_color="#444", height=15)
+            progress.pack(side="left", fill="x", expand=True, padx=10)
+            progress.set(rates[30] or 0)
+            ctk.CTkLabel(row, text=" / ".join(percent(rates[w]) for w in WINDOWS), width=120, anchor="e",
+                         text_color="grey").pack(side="left")
+
+        # Habits table
+        # Best and worst few only: a row of labels per habit is far too many widgets at thousands of habits
+        ranked = sorted(data["habits"], key=lambda h: -1 if h["rates"][30] is None else h["rates"][30], reverse=True)
+        hidden = len(ranked) - 2 * TREND_TABLE_ROWS
+        shown = ranked if hidden <= 0 else ranked[:TREND_TABLE_ROWS] + [None] + ranked[-TREND_TABLE_ROWS:]
+        title = "Habits" if hidden <= 0 else f"Habits (best and worst {TREND_TABLE_ROWS} of {len(ranked)})"
+        ctk.CTkLabel(self.scroll, text=title, font=("Segoe UI", 20, "bold"), text_color="#aaaaaa").pack(anchor="w", pady=(30, 10))
+        table = ctk.CTkFrame(self.scroll, fg_color="#2b2b2b", corner_radius=15)
+        table.pack(fill="x", pady=(0, 20))
+        headers = ["Habit"] + [f"{w}d" for w in WINDOWS] + ["Weekly goal", "Best day", "Worst day"]
+        for col, text in enumerate(headers):
+            table.grid_columnconfigure(col, weight=3 if col == 0 else 1)
+            ctk.CTkLabel(table, text=text, font=("Arial", 12, "bold"), text_color="#aaaaaa",
+                         anchor="w" if col == 0 else "center").grid(row=0, column=col, sticky="ew", padx=10, pady=(15, 5))
+        for r, habit in enumerate(shown, 1):
+            if habit is None:
+                ctk.CTkLabel(table, text=f"… {hidden} more …", text_color="grey").grid(
+                    row=r, column=0, columnspan=len(headers), pady=5)
+                continue
+            cells = [habit["name"]] + [percent(habit["rates"][w]) for w in WINDOWS]
+            cells += [percent(habit["attainment"]), habit["best_day"] or "–", habit["worst_day"] or "–"]
+            for col, text in enumerate(cells):
+                ctk.CTkLabel(table, text=text, anchor="w" if col == 0 else "center").grid(
+                    row=r, column=col, sticky="ew", padx=10, pady=2)
@@ -0,0 +1,221 @@
+"""Bitmap archive of old completions (SQLite backend).
+
+Compaction folds every daily_logs row of a finished year into one log_archive row
+per (habit, year): a 366-bit bitmap where bit i is January 1st + i days. Ten years
+of a daily habit become ten 46-byte rows instead of 3650, and recent data stays as
+plain rows so the dashboard queries never look at the archive.
+
+The folded days keep counting everywhere: daily_rollup and the stats counters are
+left as they were (the log triggers are suspended while rows move), and streaks,
+trends and exports read both tables through the helpers below.
+
+    python database.py compact            # archive everything before last January 1st
+"""
+from collections import Counter
+from datetime import date
+
+import migrations
+from storage import from_day, id_batches, to_day
+
+YEAR_BITS = 366
+YEAR_BYTES = (YEAR_BITS + 7) // 8
+
+
+# --- BITMAPS ---
+def year_start(year):
+    return to_day(date(year, 1, 1))
+
+
+def pack(bits):
+    return bits.to_bytes(YEAR_BYTES, "little")
+
+
+def unpack(blob):
+    return int.from_bytes(blob, "little")
+
+
+def popcount(bits):
+    return bin(bits).count("1")
+
+
+def iter_days(year, bits):
+    """Day numbers of the set bits, ascending"""
+    base = year_start(year)
+    while bits:
+        low = bits & -bits  # lowest set bit
+        yield base + low.bit_length() - 1
+        bits ^= low
+
+
+def iter_runs(year, bits):
+    """(first day, last day) of every run of consecutive set bits, ascending"""
+    day = year_start(year)
+    while bits:
+        skip = (bits & -bits).bit_length() - 1  # trailing zeros
+        bits >>= skip
+        length = (~bits & (bits + 1)).bit_length() - 1  # trailing ones
+        yield day + skip, day + skip + length - 1
+        bits >>= length
+        day += skip + length
+
+
+# --- READS ---
+def islands(conn, habit_ids=None):
+    """[(habit_id, first day, last day)] of every archived run, by bit scan"""
+    query = "SELECT habit_id, year, bits FROM log_archive"
+    if habit_ids is None:
+        rows = conn.execute(query).fetchall()
+    else:
+        rows = []
+        for marks, chunk in id_batches(habit_ids):
+            rows.extend(conn.execute(query + " WHERE habit_id IN (%s)" % marks, chunk).fetchall())
+    return [(h_id, first, last) for h_id, year, blob in rows for first, last in iter_runs(year, unpack(blob))]
+
+
+def merge_islands(rows, archived):
+    """Join gaps-and-islands rows (habit_id, last_day, length) of daily_logs with archived
+    runs, including runs that continue across a year or the archive boundary"""
+    spans = sorted(archived + [(h_id, last - length + 1, last) for h_id, last, length in rows if last is not None])
+    merged = []
+    for h_id, first, last in spans:
+        if merged and merged[-1][0] == h_id and first <= merged[-1][2] + 1:
+            merged[-1][2] = max(merged[-1][2], last)
+        else:
+            merged.append([h_id, first, last])
+    return [(h_id, last, last - first + 1) for h_id, first, last in merged]
+
+
+def log_days(conn, start=None):
+    """[(habit_id, day number)] of archived completions on or after day `start`"""
+    rows = conn.execute("SELECT habit_id, year, bits FROM log_archive WHERE year >= ?",
+                        (from_day(start).year if start is not None else 0,))
+    return [(h_id, day) for h_id, year, blob in rows for day in iter_days(year, unpack(blob))
+            if start is None or day >= start]
+
+
+def iter_logs(conn):
+    """(habit_id, 'YYYY-MM-DD') of archived completions, in (habit_id, day) order like the export"""
+    for h_id, year, blob in conn.execute("SELECT habit_id, year, bits FROM log_archive ORDER BY habit_id, year"):
+        for day in iter_days(year, unpack(blob)):
+            yield h_id, from_day(day).isoformat()
+
+
+def has_rows(conn):
+    return conn.execute("SELECT EXISTS (SELECT 1 FROM log_archive)").fetchone()[0]
+
+
+# --- ROLLUP / COUNTERS ---
+def _roll(conn, days, category, sign):
+    """Add (sign=1) or remove (sign=-1) completions on `days` from one category of daily_rollup"""
+    counts = Counter(days)
+    if not counts: return
+    category = category or ""
+    conn.executemany("""
+        INSERT INTO daily_rollup (day, category, completions) VALUES (?, ?, ?)
+        ON CONFLICT(day, category) DO UPDATE SET completions = completions + excluded.completions
+    """, ((day, category, sign * n) for day, n in counts.items()))
+    if sign < 0:
+        conn.execute("DELETE FROM daily_rollup WHERE category = ? AND completions <= 0", (category,))
+
+
+def _habit_days(conn, habit_id):
+    rows = conn.execute("SELECT year, bits FROM log_archive WHERE habit_id = ?", (habit_id,))
+    return [day for year, blob in rows for day in iter_days(year, unpack(blob))]
+
+
+def move_rollup(conn, habit_id, old_category, new_category):
+    """trg_rollup_habit_category only sees daily_logs; move the archived days too"""
+    if old_category == new_category: return
+    days = _habit_days(conn, habit_id)
+    _roll(conn, days, old_category, -1)
+    _roll(conn, days, new_category, 1)
+
+
+def remove_from_rollup(conn, habit_id):
+    """Before deleting a habit: drop its archived days from daily_rollup.
+    (trg_archive_habit_delete removes the archive rows and fixes the counters.)"""
+    row = conn.execute("SELECT category FROM habits WHERE habit_id = ?", (habit_id,)).fetchone()
+    if row: _roll(conn, _habit_days(conn, habit_id), row[0], -1)
+
+
+def rebuild_rollup(conn):
+    """migrations.rebuild_rollup() plus the archived days"""
+    migrations.rebuild_rollup(conn)
+    rows = conn.execute("""
+        SELECT COALESCE(h.category, ''), a.year, a.bits
+        FROM log_archive a LEFT JOIN habits h ON h.habit_id = a.habit_id
+    """)
+    days = {}
+    for category, year, blob in rows:
+        days.setdefault(category, []).extend(iter_days(year, unpack(blob)))
+    for category, values in days.items():
+        _roll(conn, values, category, 1)
+
+
+def rebuild_stats(conn):
+    """migrations.rebuild_stats() plus the archived completions"""
+    migrations.rebuild_stats(conn)
+    conn.execute("""
+        INSERT INTO habit_stats (habit_id, completions)
+        SELECT habit_id, SUM(completions) FROM log_archive WHERE true GROUP BY habit_id
+        ON CONFLICT(habit_id) DO UPDATE SET completions = completions + excluded.completions
+    """)
+    conn.execute("""
+        UPDATE stats SET value = value + (SELECT COALESCE(SUM(completions), 0) FROM log_archive)
+        WHERE key = 'total_completions'
+    """)
+
+
+# --- COMPACTION ---
+def compact(conn, before):
+    """Fold every daily_logs row before day number `before` into log_archive.
+    Run inside a transaction. Returns (rows folded, days that were already archived)."""
+    rows = conn.execute("SELECT habit_id, day FROM daily_logs WHERE day < ? ORDER BY habit_id, day", (before,))
+    folded = {}
+    year, year_from, year_to = None, 0, 0
+    for h_id, day in rows:
+        if not year_from <= day < year_to:
+            year = from_day(day).year
+            year_from, year_to = year_start(year), year_start(year + 1)
+        folded[h_id, year] = folded.get((h_id, year), 0) | 1 << (day - year_from)
+    if not folded: return 0, 0
+
+    # Days already in the archive (e.g. re-imported history) were counted twice by the triggers
+    doubled = []
+    for (h_id, year), bits in folded.items():
+        row = conn.execute("SELECT bits FROM log_archive WHERE habit_id = ? AND year = ?", (h_id, year)).fetchone()
+        if row:
+            old = unpack(row[0])
+            doubled.extend((h_id, day) for day in iter_days(year, old & bits))
+            folded[h_id, year] = bits | old
+    conn.executemany("""
+        INSERT INTO log_archive (habit_id, year, bits, completions) VALUES (?, ?, ?, ?)
+        ON CONFLICT(habit_id, year) DO UPDATE SET bits = excluded.bits, completions = excluded.completions
+    """, ((h_id, year, pack(bits), popcount(bits)) for (h_id, year), bits in folded.items()))
+
+    # Move the rows without the log triggers, so the rollup and counters still include them
+    migrations.drop_rollup_triggers(conn)
+    migrations.drop_stats_triggers(conn)
+    moved = conn.execute("DELETE FROM daily_logs WHERE day < ?", (before,)).rowcount
+    migrations.create_rollup_triggers(conn)
+    migrations.create_stats_triggers(conn)
+
+    if doubled:
+        per_habit = Counter(h_id for h_id, day in doubled)
+        conn.executemany("UPDATE habit_stats SET completions = completions - ? WHERE habit_id = ?",
+                         [(n, h_id) for h_id, n in per_habit.items()])
+        conn.execute("UPDATE stats SET value = value - ? WHERE key = 'total_completions'", (len(doubled),))
+        categories = dict(conn.execute("SELECT habit_id, category FROM habits"))
+        by_category = {}
+        for h_id, day in doubled:
+            by_category.setdefault(categories.get(h_id), []).append(day)
+        for category, days in by_category.items():
+            _roll(conn, days, category, -1)
+    return moved, len(doubled)
+
+
+def refold(conn):
+    """After loading logs: fold any that landed in already-archived years.
+    Returns how many of them were already in the archive."""
+    row = conn.execute("SELECT MAX(year) FROM log_archive").fetchone()
+    return compact(conn, year_start(row[0] + 1))[1] if row[0] is not None else 0
@@ -0,0 +1,185 @@
+"""Benchmark Database hot paths against synthetic profiles.
+
+Generates a throwaway habits.db in a temp directory, times the calls the
+dashboard and analytics pages make, and writes percentiles as JSON so runs
+from different commits can be compared.
+
+    python benchmark.py --profile small
+    python benchmark.py --habits 1000 --logs 2000000 --out before.json
+    python benchmark.py --profile small --out after.json --compare before.json
+"""
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from database import Database
+from transfer import import_rows
+
+# (habits, log rows)
+PROFILES = {
+    "tiny": (10, 1_000),
+    "small": (1_000, 100_000),
+    "medium": (1_000, 1_000_000),
+    "large": (10_000, 10_000_000),
+    "huge": (10_000, 50_000_000),
+}
+CATEGORIES = ["General", "Health", "Work", "Learning", "Creative"]
+DENSITY = 0.8  # share of days a habit is checked off, so streaks have realistic gaps
+
+
+# --- DATA ---
+def generate(path, habits, logs, seed=42):
+    """Fill a fresh database with `habits` habits and ~`logs` log rows ending today"""
+    rng = random.Random(seed)
+    db = Database(path)
+    with db.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO habits (habit_name, reminder_time, category, weekly_target) VALUES (?, ?, ?, ?)",
+            ((f"Habit {i}", f"{rng.randrange(24):02d}:{rng.randrange(60):02d}" if rng.random() < 0.5 else None,
+              rng.choice(CATEGORIES), rng.choice([0, 0, 3, 5])) for i in range(habits)))
+    db.invalidate_cache()
+
+    per_habit = logs // habits
+    extra = logs % habits
+    today = date.today()
+
+    def log_rows():
+        for h_id in range(1, habits + 1):
+            wanted = per_habit + (1 if h_id <= extra else 0)
+            day = today
+            while wanted:
+                if rng.random() < DENSITY:
+                    yield (h_id, day.isoformat())
+                    wanted -= 1
+                day -= timedelta(days=1)
+
+    import_rows(db, "logs", log_rows(), defer_indexes=True)
+    db.get_connection().execute("ANALYZE")
+    return db
+
+
+# --- TIMING ---
+def percentiles(samples):
+    samples = sorted(samples)
+    cuts = statistics.quantiles(samples, n=100, method="inclusive") if len(samples) > 1 else samples * 99
+    return {
+        "n": len(samples),
+        "min_ms": samples[0] * 1000,
+        "p50_ms": cuts[49] * 1000,
+        "p90_ms": cuts[89] * 1000,
+        "p95_ms": cuts[94] * 1000,
+        "p99_ms": cuts[98] * 1000,
+        "max_ms": samples[-1] * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000,
+    }
+
+
+def time_calls(fn, repeat):
+    fn()  # warm-up: connection, statement cache, metadata cache
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def run(db, habits, repeat, seed=7):
+    rng = random.Random(seed)
+    pick = lambda: rng.randint(1, habits)
+    toggles = {"state": True}
+
+    def toggle():
+        toggles["state"] = not toggles["state"]
+        db.toggle_habit(pick(), toggles["state"])
+
+    cases = {
+        "get_habits": lambda: db.get_habits(),
+        "get_streak": lambda: db.get_streak(pick()),
+        "get_activity_data": lambda: db.get_activity_data(),
+        "get_category_performance": lambda: db.get_category_performance(),
+        "toggle_habit": toggle,
+        "get_total_completions": lambda: db.get_total_completions(),
+    }
+    results = {}
+    for name, fn in cases.items():
+        results[name] = time_calls(fn, repeat)
+        print(f"  {name:<26} p50 {results[name]['p50_ms']:9.3f} ms   p95 {results[name]['p95_ms']:9.3f} ms")
+    return results
+
+
+# --- REPORTING ---
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(current, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline_path} (commit {baseline['meta'].get('commit')}), p95:")
+    for name, stats in current["results"].items():
+        old = baseline["results"].get(name)
+        if not old: continue
+        ratio = stats["p95_ms"] / old["p95_ms"] if old["p95_ms"] else float("inf")
+        print(f"  {name:<26} {old['p95_ms']:9.3f} -> {stats['p95_ms']:9.3f} ms  ({ratio:.2f}x)")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark Database hot paths on synthetic data")
+    parser.add_argument("--profile", choices=list(PROFILES), default="tiny")
+    parser.add_argument("--habits", type=int, help="override the profile's habit count")
+    parser.add_argument("--logs", type=int, help="override the profile's log row count")
+    parser.add_argument("--repeat", type=int, default=50, help="timed calls per method")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    parser.add_argument("--keep", action="store_true", help="keep the generated database and print its path")
+    args = parser.parse_args()
+
+    habits, logs = PROFILES[args.profile]
+    habits, logs = args.habits or habits, args.logs or logs
+    workdir = tempfile.mkdtemp(prefix="questlog-bench-")
+    path = os.path.join(workdir, "habits.db")
+    try:
+        print(f"Generating {habits} habits / {logs} logs ...")
+        start = time.perf_counter()
+        db = generate(path, habits, logs)
+        print(f"  done in {time.perf_counter() - start:.1f} s ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+        print("Timing:")
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "platform": platform.platform(),
+                "habits": habits,
+                "logs": logs,
+                "repeat": args.repeat,
+            },
+            "results": run(db, habits, args.repeat),
+        }
+        db.close()
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"Results written to {args.out}")
+        if args.compare:
+            compare(report, args.compare)
+    finally:
+        if args.keep: print(f"Database kept at {path}", file=sys.stderr)
+        else: shutil.rmtree(workdir, ignore_errors=True)
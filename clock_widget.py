@@ -1,25 +1,76 @@
+import tkinter
 import customtkinter as ctk
 from datetime import datetime
 
+TICK_SLACK_MS = 50  # land just after the minute boundary, never just before it
+
+class TickService:
+    """One after() chain for the whole app, firing at the start of every minute.
+
+    Everything time-based (the clock, the day rollover, reminder checks) subscribes
+    here instead of running its own timer. Callbacks get the current datetime and run
+    on the Tk thread; a subscription tied to a widget ends when the widget is destroyed.
+    """
+    def __init__(self, root):
+        self.root = root
+        self._subscribers = {}  # token -> callback
+        self._next_token = 0
+        self._after_id = None
+
+    def subscribe(self, callback, owner=None):
+        """Call callback(now) every minute; returns a token for unsubscribe()"""
+        self._next_token += 1
+        token = self._next_token
+        self._subscribers[token] = callback
+        if owner is not None:
+            # tkinter's bind, not CTk's (which binds the inner canvas/label instead)
+            def on_destroy(event):
+                if event.widget is owner: self.unsubscribe(token)
+            tkinter.Misc.bind(owner, "<Destroy>", on_destroy, add="+")
+        return token
+
+    def unsubscribe(self, token):
+        self._subscribers.pop(token, None)
+
+    def start(self):
+        if self._after_id is None: self._schedule()
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _schedule(self):
+        # Recomputed every time, so a suspend/resume or clock change realigns itself
+        now = datetime.now()
+        delay = 60000 - (now.second * 1000 + now.microsecond // 1000) + TICK_SLACK_MS
+        self._after_id = self.root.after(delay, self._tick)
+
+    def _tick(self):
+        now = datetime.now()
+        for callback in list(self._subscribers.values()):
+            try: callback(now)
+            except Exception as e: print(f"Tick error: {e}")
+        self._schedule()
+
 class RealTimeClock(ctk.CTkLabel):
-    def __init__(self, parent):
+    def __init__(self, parent, ticks):
         super().__init__(
-            parent, 
-            text="00:00 AM", 
-            font=("Segoe UI", 24, "bold"), 
+            parent,
+            text="00:00 AM",
+            font=("Segoe UI", 24, "bold"),
             text_color="#2CC985"  # Matches your theme
         )
-        self.update_clock()
+        self.update_clock(datetime.now())
+        # Only minutes are shown, so redraw once a minute; the subscription ends with the label
+        ticks.subscribe(self.update_clock, owner=self)
 
-    def update_clock(self):
+    def update_clock(self, now):
         # Get time in 12-hour format with AM/PM (e.g., "02:30 PM")
-        current_time = datetime.now().strftime("%I:%M %p")
-        
+        current_time = now.strftime("%I:%M %p")
+
         # Remove leading zero if you prefer "2:30" over "02:30" (Optional)
         # if current_time.startswith("0"):
         #     current_time = current_time[1:]
 
         self.configure(text=current_time)
-        
-        # Schedule this function to run again in 1000ms (1 second)
-        self.after(1000, self.update_clock)
\ No newline at end of file
@@ -1,8 +1,11 @@
 import customtkinter as ctk
+import tkinter as tk
 from PIL import Image
 import os
 import sys
 
+import levels
+
 # --- HELPER: PATH FIX FOR .EXE ---
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -12,65 +15,77 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
+# --- SHARED ICONS ---
+class IconCache:
+    """Process-wide CTkImage registry. Each asset is decoded once, on first use,
+    and the same CTkImage is shared by every widget asking for that path and size."""
+    def __init__(self):
+        self._images = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, relative_path, size=(18, 18)):
+        """CTkImage for an asset, or None if it can't be loaded (also cached)"""
+        key = (relative_path, size)
+        if key in self._images:
+            self.hits += 1
+            return self._images[key]
+        self.misses += 1
+        try:
+            image = Image.open(resource_path(relative_path))
+            image.load()  # decode now, not lazily on every resize
+            icon = ctk.CTkImage(light_image=image, dark_image=image, size=size)
+        except (OSError, ValueError):
+            icon = None
+        self._images[key] = icon
+        return icon
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "cached": len(self._images)}
+
+icons = IconCache()
+
 class HabitCard(ctk.CTkFrame):
+    """One quest row. Widgets are built once; refresh() patches them in place."""
     def __init__(self, parent, h_id, name, time, category, color, target, progress, is_done, streak, toggle_callback, delete_callback, edit_callback):
-        
-        border_col = color if color else "#333333"
-        super().__init__(parent, fg_color="#2b2b2b", corner_radius=15, border_width=2, border_color=border_col)
+        super().__init__(parent, fg_color="#2b2b2b", corner_radius=15, border_width=2)
         
         self.h_id = h_id
         self.toggle_callback = toggle_callback
         self.delete_callback = delete_callback
         self.edit_callback = edit_callback
-        self.name = name
-        self.time = time
-        self.category = category
-        self.target = target
         
         self.columnconfigure(0, weight=1)
         
-        # Load Icons using resource_path
-        try:
-            edit_path = resource_path(os.path.join("assets", "edit.png"))
-            del_path = resource_path(os.path.join("assets", "delete.png"))
-            self.edit_icon = ctk.CTkImage(light_image=Image.open(edit_path), dark_image=Image.open(edit_path), size=(18, 18))
-            self.del_icon = ctk.CTkImage(light_image=Image.open(del_path), dark_image=Image.open(del_path), size=(18, 18))
-            has_icons = True
-        except:
-            has_icons = False
+        # Shared icons (decoded once per process)
+        self.edit_icon = icons.get(os.path.join("assets", "edit.png"))
+        self.del_icon = icons.get(os.path.join("assets", "delete.png"))
+        has_icons = self.edit_icon is not None and self.del_icon is not None
 
         # Info Row
         info_frame = ctk.CTkFrame(self, fg_color="transparent")
         info_frame.grid(row=0, column=0, padx=15, pady=(15, 5), sticky="ew")
-        
-        text_color = "#2CC985" if is_done else "white"
-        ctk.CTkLabel(info_frame, text=name, font=("Segoe UI", 16, "bold"), text_color=text_color).pack(side="left")
-        ctk.CTkLabel(info_frame, text=category.upper(), font=("Arial", 9, "bold"), text_color=border_col).pack(side="left", padx=8)
-        if time: ctk.CTkLabel(info_frame, text=f"⏰ {time}", font=("Arial", 12), text_color="grey").pack(side="left")
+        self.name_label = ctk.CTkLabel(info_frame, font=("Segoe UI", 16, "bold"))
+        self.name_label.pack(side="left")
+        self.cat_label = ctk.CTkLabel(info_frame, font=("Arial", 9, "bold"))
+        self.cat_label.pack(side="left", padx=8)
+        self.time_label = ctk.CTkLabel(info_frame, font=("Arial", 12), text_color="grey")
 
-        # Weekly Progress
-        if target > 0:
-            prog_frame = ctk.CTkFrame(self, fg_color="transparent", height=10)
-            prog_frame.grid(row=1, column=0, padx=15, pady=(0, 15), sticky="ew")
-            status_col = "#2CC985" if progress >= target else "#aaaaaa"
-            ctk.CTkLabel(prog_frame, text=f"Weekly: {progress}/{target}", font=("Arial", 10), text_color=status_col).pack(side="left")
-            bar = ctk.CTkProgressBar(prog_frame, width=100, height=6, progress_color=status_col)
-            bar.pack(side="right")
-            percent = progress / target if target > 0 else 0
-            if percent > 1: percent = 1
-            bar.set(percent)
-
-        # Streak
-        if streak > 0:
-            fire_col = "#FF9F1C" if streak > 3 else "#888888"
-            self.streak_frame = ctk.CTkFrame(self, fg_color="transparent", border_width=1, border_color=fire_col, corner_radius=20, height=25)
-            self.streak_frame.grid(row=0, column=1, padx=5)
-            ctk.CTkLabel(self.streak_frame, text=f"🔥 {streak}", font=("Arial", 12, "bold"), text_color=fire_col).pack(padx=8, pady=2)
+        # Weekly Progress (shown only for weekly targets)
+        self.prog_frame = ctk.CTkFrame(self, fg_color="transparent", height=10)
+        self.prog_label = ctk.CTkLabel(self.prog_frame, font=("Arial", 10))
+        self.prog_label.pack(side="left")
+        self.prog_bar = ctk.CTkProgressBar(self.prog_frame, width=100, height=6)
+        self.prog_bar.pack(side="right")
+
+        # Streak (shown only while a streak is alive)
+        self.streak_frame = ctk.CTkFrame(self, fg_color="transparent", border_width=1, corner_radius=20, height=25)
+        self.streak_label = ctk.CTkLabel(self.streak_frame, font=("Arial", 12, "bold"))
+        self.streak_label.pack(padx=8, pady=2)
 
         # Checkbox
         self.chk = ctk.CTkCheckBox(self, text="", width=24, height=24, corner_radius=8, 
                                    border_color="#2CC985", fg_color="#2CC985", hover_color="#1e8e5e", command=self.on_toggle)
-        if is_done: self.chk.select()
         self.chk.grid(row=0, column=2, padx=(0, 10))
 
         # Buttons
@@ -83,10 +98,212 @@ class HabitCard(ctk.CTkFrame):
         self.edit_btn.grid(row=0, column=3, padx=(0, 5))
         self.del_btn.grid(row=0, column=4, padx=(0, 15))
 
+        self.refresh(name, time, category, color, target, progress, is_done, streak)
+
+    def show(self, h_id, *state):
+        """Rebind a recycled card to another habit"""
+        self.h_id = h_id
+        self.refresh(*state)
+
+    def refresh(self, name, time, category, color, target, progress, is_done, streak):
+        self.name = name
+        self.time = time
+        self.category = category
+        self.target = target
+        self.is_done = bool(is_done)
+
+        border_col = color if color else "#333333"
+        self.configure(border_color=border_col)
+        self.name_label.configure(text=name, text_color="#2CC985" if is_done else "white")
+        self.cat_label.configure(text=category.upper(), text_color=border_col)
+        if time:
+            self.time_label.configure(text=f"⏰ {time}")
+            self.time_label.pack(side="left")
+        else:
+            self.time_label.pack_forget()
+
+        if target > 0:
+            status_col = "#2CC985" if progress >= target else "#aaaaaa"
+            self.prog_label.configure(text=f"Weekly: {progress}/{target}", text_color=status_col)
+            self.prog_bar.configure(progress_color=status_col)
+            self.prog_bar.set(min(progress / target, 1))
+            self.prog_frame.grid(row=1, column=0, padx=15, pady=(0, 15), sticky="ew")
+        else:
+            self.prog_frame.grid_remove()
+
+        if streak > 0:
+            fire_col = "#FF9F1C" if streak > 3 else "#888888"
+            self.streak_frame.configure(border_color=fire_col)
+            self.streak_label.configure(text=f"🔥 {streak}", text_color=fire_col)
+            self.streak_frame.grid(row=0, column=1, padx=5)
+        else:
+            self.streak_frame.grid_remove()
+
+        if is_done: self.chk.select()
+        else: self.chk.deselect()
+
     def on_toggle(self): self.toggle_callback(self.h_id, self.chk.get())
     def on_delete(self): self.delete_callback(self.h_id)
     def on_edit(self): self.edit_callback(self.h_id, self.name, self.time, self.category, self.target)
 
+class VirtualHabitList(ctk.CTkFrame):
+    """Scrollable habit list that only builds cards for the rows in view.
+
+    Rows are fetched in keyset pages through load_page(after_id, limit, on_done),
+    where on_done receives (rows, streaks). Cards sit on a canvas at fixed slot
+    heights and are recycled as rows scroll in and out of the viewport.
+    """
+    ROW_HEIGHT = 96
+    SLOT = ROW_HEIGHT + 12
+    OVERSCAN = 3
+    PAGE_SIZE = 50
+
+    def __init__(self, parent, load_page, toggle_callback, delete_callback, edit_callback):
+        super().__init__(parent, fg_color="transparent")
+        self.load_page = load_page
+        self.callbacks = (toggle_callback, delete_callback, edit_callback)
+        self.color_map = {}
+        self.total = None     # habit count for the current filter (None = not known yet)
+        self.rows = []        # loaded rows in habit_id order
+        self.streaks = {}
+        self.index = {}       # habit_id -> position in rows
+        self.generation = 0   # bumped by reset() so stale pages are ignored
+        self.loading = False
+        self.visible = {}     # row position -> (card, canvas window id)
+        self.spare = []       # detached (card, window id) pairs ready for reuse
+
+        self.canvas = tk.Canvas(self, bg=self._apply_appearance_mode(ctk.ThemeManager.theme["CTk"]["fg_color"]),
+                                highlightthickness=0, yscrollincrement=20)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.on_scroll)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.placeholder = self.canvas.create_text(20, 20, anchor="nw", text="Loading quests...", fill="grey")
+
+        self.canvas.bind("<Configure>", lambda e: self.layout())
+        # Wheel bindings on our own widgets (the canvas and every card), never bind_all:
+        # the global tag belongs to CustomTkinter's scrollable frames
+        self.bind_wheel(self.canvas)
+
+    # --- DATA ---
+    def reset(self, total):
+        """Start over (filter change or full refresh) with `total` rows to page through"""
+        self.generation += 1
+        self.total = total
+        self.rows, self.streaks, self.index = [], {}, {}
+        self.loading = False
+        self.canvas.yview_moveto(0)
+        self.layout()
+
+    def request_page(self):
+        if self.loading or self.total is None or len(self.rows) >= self.total: return
+        self.loading = True
+        generation = self.generation
+        after_id = self.rows[-1][0] if self.rows else 0
+        self.load_page(after_id, self.PAGE_SIZE, lambda result: self.add_page(generation, *result))
+
+    def add_page(self, generation, rows, streaks):
+        if generation != self.generation or not self.winfo_exists(): return
+        self.loading = False
+        for row in rows:
+            self.index[row[0]] = len(self.rows)
+            self.rows.append(row)
+        self.streaks.update(streaks)
+        if not rows: self.total = len(self.rows)  # habits were deleted under us
+        self.layout()
+
+    def has(self, h_id):
+        return h_id in self.index
+
+    def update_row(self, row, streak):
+        i = self.index.get(row[0])
+        if i is None: return
+        self.rows[i] = row
+        self.streaks[row[0]] = {"current": streak}
+        if i in self.visible: self.bind_card(self.visible[i][0], i)
+
+    def append_row(self, row, streak):
+        """A new habit: ids only grow, so it belongs at the end"""
+        if self.total is None: return
+        self.total += 1
+        if len(self.rows) == self.total - 1:  # fully loaded: keep it, otherwise paging will reach it
+            self.index[row[0]] = len(self.rows)
+            self.rows.append(row)
+            self.streaks[row[0]] = {"current": streak}
+        self.layout()
+
+    def remove_row(self, h_id):
+        i = self.index.pop(h_id, None)
+        if i is None: return
+        del self.rows[i]
+        for j in range(i, len(self.rows)): self.index[self.rows[j][0]] = j
+        self.total -= 1
+        self.release_all()  # positions shifted; rebind everything in view
+        self.layout()
+
+    # --- VIEW ---
+    def layout(self):
+        total = self.total or 0
+        width = self.canvas.winfo_width()
+        height = max(total * self.SLOT, 1)
+        self.canvas.configure(scrollregion=(0, 0, width, height))
+        top = self.canvas.canvasy(0)
+        first = max(int(top // self.SLOT) - self.OVERSCAN, 0)
+        last = min(int((top + self.canvas.winfo_height()) // self.SLOT) + self.OVERSCAN, total - 1)
+
+        # Detach cards that scrolled out, then fill the window
+        for i in [i for i in self.visible if i < first or i > last or i >= len(self.rows)]:
+            self.release(i)
+        for i in range(first, min(last, len(self.rows) - 1) + 1):
+            if i not in self.visible:
+                if self.spare: card, window = self.spare.pop()
+                else:
+                    card = HabitCard(self.canvas, None, "", "", "", None, 0, 0, 0, 0, *self.callbacks)
+                    window = self.canvas.create_window(0, 0, anchor="nw", window=card)
+                    self.bind_wheel(card)
+                self.bind_card(card, i)
+                self.canvas.itemconfigure(window, state="normal")
+                self.visible[i] = (card, window)
+            card, window = self.visible[i]
+            self.canvas.coords(window, 0, i * self.SLOT)
+            self.canvas.itemconfigure(window, width=width, height=self.ROW_HEIGHT)
+
+        if self.total == 0: text, waiting = "No quests yet. Add one above!", True
+        else: text, waiting = "Loading quests...", self.total is None or last >= len(self.rows)
+        self.canvas.itemconfigure(self.placeholder, text=text, state="normal" if waiting else "hidden")
+        self.canvas.coords(self.placeholder, 20, len(self.rows) * self.SLOT + 20)
+        if last >= len(self.rows) - 1: self.request_page()
+
+    def bind_card(self, card, i):
+        (h_id, name, remind_time, category, target, is_done, progress) = self.rows[i]
+        card.show(h_id, name, remind_time or "", category, self.color_map.get(category, "#888"), target, progress,
+                  is_done, self.streaks.get(h_id, {}).get("current", 0))
+
+    def release(self, i):
+        card, window = self.visible.pop(i)
+        self.canvas.itemconfigure(window, state="hidden")
+        self.spare.append((card, window))
+
+    def release_all(self):
+        for i in list(self.visible): self.release(i)
+
+    def on_scroll(self, *args):
+        self.canvas.yview(*args)
+        self.layout()
+
+    def bind_wheel(self, widget):
+        """Scroll the list from the wheel over `widget` and all of its inner Tk widgets.
+        tk.Misc.bind, since CTk widgets' bind() only reaches some of their parts."""
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            tk.Misc.bind(widget, seq, self.on_wheel, add="+")
+        for child in widget.winfo_children():
+            self.bind_wheel(child)
+
+    def on_wheel(self, event):
+        if not self.winfo_exists(): return
+        step = -1 if event.num == 4 or event.delta > 0 else 1  # X11 sends Button-4/5, others MouseWheel
+        self.on_scroll("scroll", step, "units")
+
 class Sidebar(ctk.CTkFrame):
     def __init__(self, parent, nav_callback, total_xp, level, next_level_xp, theme_callback):
         super().__init__(parent, width=220, corner_radius=0, fg_color="#1a1a1a")
@@ -95,28 +312,26 @@ class Sidebar(ctk.CTkFrame):
         
         ctk.CTkLabel(self, text="QUESTLOG", font=("Impact", 28), text_color="#2CC985").pack(pady=(40, 20))
 
-        # Stats
+        # Stats (filled in by update_stats)
         stats = ctk.CTkFrame(self, fg_color="#2b2b2b", corner_radius=10)
         stats.pack(fill="x", padx=15, pady=(0, 30))
-        ctk.CTkLabel(stats, text=f"LVL {level}", font=("Arial", 10, "bold"), text_color="#2CC985").pack(pady=(10,0))
-        titles = {1: "Novice", 2: "Apprentice", 3: "Hustler", 4: "Master", 5: "God Mode"}
-        ctk.CTkLabel(stats, text=titles.get(level, "Legend").upper(), font=("Segoe UI", 16, "bold"), text_color="white").pack(pady=(0, 5))
-        xp_bar = ctk.CTkProgressBar(stats, height=8, corner_radius=5, progress_color="#e67e22")
-        xp_bar.pack(fill="x", padx=10, pady=(0, 15))
-        xp_bar.set(total_xp / next_level_xp if next_level_xp > 0 else 1)
+        self.level_label = ctk.CTkLabel(stats, font=("Arial", 10, "bold"), text_color="#2CC985")
+        self.level_label.pack(pady=(10,0))
+        self.title_label = ctk.CTkLabel(stats, font=("Segoe UI", 16, "bold"), text_color="white")
+        self.title_label.pack(pady=(0, 5))
+        self.xp_bar = ctk.CTkProgressBar(stats, height=8, corner_radius=5, progress_color="#e67e22")
+        self.xp_bar.pack(fill="x", padx=10, pady=(0, 15))
 
         # Navigation
         self.create_nav_btn("🏠  Dashboard", "dashboard")
         self.create_nav_btn("📊  Analytics", "analytics")
         self.create_nav_btn("📈  Performance", "performance")
+        self.create_nav_btn("📅  Trends", "trends")
 
         # Themes
         ctk.CTkLabel(self, text="UNLOCKABLES", font=("Arial", 10, "bold"), text_color="#555").pack(side="bottom", pady=(0, 10))
-        if level >= 5:
-            btn = ctk.CTkButton(self, text="🎨 Cyberpunk", fg_color="#8e44ad", command=lambda: self.theme_callback("cyberpunk"))
-        else:
-            btn = ctk.CTkButton(self, text="🔒 Lvl 5 to Unlock", fg_color="#333", state="disabled", text_color="#555")
-        btn.pack(side="bottom", padx=20, pady=20)
+        self.theme_btn = ctk.CTkButton(self, command=lambda: self.theme_callback("cyberpunk"))
+        self.theme_btn.pack(side="bottom", padx=20, pady=20)
         
         # Settings
         self.settings_btn = ctk.CTkButton(self, text="⚙️ Settings", fg_color="transparent", 
@@ -124,5 +339,21 @@ class Sidebar(ctk.CTkFrame):
                                           command=lambda: self.nav_callback("settings"))
         self.settings_btn.pack(side="bottom", padx=20, pady=(0, 20))
 
+        self.level = None
+        self.update_stats(total_xp, level, next_level_xp)
+
+    def update_stats(self, total_xp, level, next_level_xp):
+        """Move the XP bar, and relabel only when the level actually changed"""
+        self.xp_bar.set(total_xp / next_level_xp if next_level_xp > 0 else 1)
+        if level == self.level: return
+        self.level = level
+        self.level_label.configure(text=f"LVL {level}")
+        self.title_label.configure(text=levels.title_for(level).upper())
+        if level >= levels.CYBERPUNK_LEVEL:
+            self.theme_btn.configure(text="🎨 Cyberpunk", fg_color="#8e44ad", state="normal",
+                                     text_color=ctk.ThemeManager.theme["CTkButton"]["text_color"])
+        else:
+            self.theme_btn.configure(text=f"🔒 Lvl {levels.CYBERPUNK_LEVEL} to Unlock", fg_color="#333", state="disabled", text_color="#555")
+
     def create_nav_btn(self, text, value):
         ctk.CTkButton(self, text=text, fg_color="transparent", text_color="#cccccc", hover_color="#333", anchor="w", height=40, font=("Segoe UI", 16), command=lambda: self.nav_callback(value)).pack(fill="x", padx=10, pady=5)
\ No newline at end of file
@@ -1,249 +1,502 @@
 import sqlite3
-from datetime import date, timedelta, datetime
+import threading
+from contextlib import contextmanager
+from datetime import date
 
-class Database:
-    def __init__(self):
-        self.db_name = "habits.db"
+import archive
+import profiling
+from migrations import migrate
+from storage import WEEK_STARTS, StorageBackend, from_day, id_batches, streaks_from_islands, to_day, week_bounds
+
+# Connection tuning applied once per connection (not per call)
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -8000",
+    "PRAGMA busy_timeout = 5000",
+)
+STATEMENT_CACHE_SIZE = 256
+KEEP_YEARS = 1  # `compact` leaves last year and this year as rows
+
+class Database(StorageBackend):
+    """SQLite backend: one pooled connection per thread, migrations via PRAGMA user_version"""
+    def __init__(self, db_name="habits.db", week_start="monday"):
+        if week_start not in WEEK_STARTS:
+            raise ValueError(f"week_start must be one of {sorted(WEEK_STARTS)}")
+        self.db_name = db_name
+        self.week_start = week_start
+        self._local = threading.local()
+        self._conns = []
+        self._conns_lock = threading.Lock()
+
+        # Write-through cache of rarely-changing rows. Every write bumps data_version,
+        # so callers can compare it with the version they last rendered.
+        self._cache_lock = threading.RLock()
+        self._categories = None   # [(cat_id, name, color)]
+        self._habit_meta = None   # {habit_id: (name, reminder_time, category, weekly_target)}, in id order
+        self.data_version = 0
+
+        if profiling.ENABLED:
+            profiling.instrument(self)
         self.init_db()
 
     def get_connection(self):
-        return sqlite3.connect(self.db_name)
+        """Long-lived connection owned by the calling thread. Do not close it."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: we issue BEGIN/COMMIT ourselves in transaction().
+            # check_same_thread=False only so close() can run on another thread; each
+            # connection is still used by the thread that opened it.
+            conn = sqlite3.connect(self.db_name, isolation_level=None, cached_statements=STATEMENT_CACHE_SIZE,
+                                   check_same_thread=False,
+                                   factory=profiling.ProfiledConnection if profiling.ENABLED else sqlite3.Connection)
+            for pragma in PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            self._local.depth = 0
+            with self._conns_lock:
+                self._conns.append(conn)
+        return conn
 
-    def init_db(self):
+    @contextmanager
+    def transaction(self):
+        """Group several calls into one transaction. Nested blocks join the outer one."""
         conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
-        
-        # 1. Habits
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS habits (
-                habit_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                habit_name TEXT NOT NULL,
-                reminder_time TEXT,
-                category TEXT DEFAULT 'General',
-                weekly_target INTEGER DEFAULT 0
-            )
-        """)
-        
-        # 2. Logs
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS daily_logs (
-                log_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                habit_id INTEGER,
-                log_date TEXT,
-                FOREIGN KEY(habit_id) REFERENCES habits(habit_id) ON DELETE CASCADE
-            )
-        """)
-
-        # 3. Categories
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS categories (
-                cat_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE,
-                color TEXT
-            )
-        """)
-        
-        # Seed Defaults
-        cursor.execute("SELECT count(*) FROM categories")
-        if cursor.fetchone()[0] == 0:
-            defaults = [
-                ("General", "#888888"),
-                ("Health", "#3498db"),
-                ("Work", "#e74c3c"),
-                ("Learning", "#2ecc71"),
-                ("Creative", "#9b59b6")
-            ]
-            cursor.executemany("INSERT INTO categories (name, color) VALUES (?, ?)", defaults)
-
-        conn.commit()
-        conn.close()
+        depth = self._local.depth
+        if depth == 0:
+            conn.execute("BEGIN")
+        self._local.depth = depth + 1
+        try:
+            yield conn
+        except BaseException:
+            self._local.depth = depth
+            if depth == 0:
+                conn.rollback()
+                self.invalidate_cache()  # write-through updates may describe rolled-back rows
+            raise
+        self._local.depth = depth
+        if depth == 0:
+            conn.commit()
+
+    def close(self):
+        """Close every pooled connection (call on app shutdown)."""
+        with self._conns_lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            conn.close()  # the last one checkpoints the WAL and removes -wal/-shm
+        self._local = threading.local()
+
+    # --- CACHE ---
+    def invalidate_cache(self):
+        """Forget cached rows, e.g. after another process or raw SQL changed the file"""
+        with self._cache_lock:
+            self._categories = None
+            self._habit_meta = None
+            self.data_version += 1
+
+    def _changed(self):
+        with self._cache_lock:
+            self.data_version += 1
+
+    def _in_transaction(self):
+        """Inside transaction() reads come from a snapshot that may predate other threads'
+        commits, so they must not fill the shared caches (the next write-through would miss)"""
+        return getattr(self._local, "depth", 0) > 0
+
+    def _cached_habit_meta(self):
+        with self._cache_lock:
+            if self._habit_meta is not None:
+                return self._habit_meta
+            rows = self.get_connection().execute(
+                "SELECT habit_id, habit_name, reminder_time, category, weekly_target FROM habits ORDER BY habit_id")
+            meta = {row[0]: row[1:] for row in rows}
+            if not self._in_transaction(): self._habit_meta = meta
+            return meta
+
+    def init_db(self):
+        with self.transaction() as conn:
+            cursor = conn.cursor()
+
+            # 1. Habits
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS habits (
+                    habit_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    habit_name TEXT NOT NULL,
+                    reminder_time TEXT,
+                    category TEXT DEFAULT 'General',
+                    weekly_target INTEGER DEFAULT 0
+                )
+            """)
+
+            # 2. Logs (rebuilt as WITHOUT ROWID (habit_id, day INTEGER) by migration 6)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS daily_logs (
+                    log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    habit_id INTEGER,
+                    log_date TEXT,
+                    FOREIGN KEY(habit_id) REFERENCES habits(habit_id) ON DELETE CASCADE
+                )
+            """)
+
+            # 3. Categories
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS categories (
+                    cat_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT UNIQUE,
+                    color TEXT
+                )
+            """)
+
+            # Seed Defaults
+            cursor.execute("SELECT count(*) FROM categories")
+            if cursor.fetchone()[0] == 0:
+                defaults = [
+                    ("General", "#888888"),
+                    ("Health", "#3498db"),
+                    ("Work", "#e74c3c"),
+                    ("Learning", "#2ecc71"),
+                    ("Creative", "#9b59b6")
+                ]
+                cursor.executemany("INSERT INTO categories (name, color) VALUES (?, ?)", defaults)
+
+        # Indexes, constraints and later schema changes
+        migrate(self.get_connection())
 
     # --- CATEGORY MANAGEMENT ---
     def get_all_categories(self):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT cat_id, name, color FROM categories")
-        results = cursor.fetchall()
-        conn.close()
-        return results
+        with self._cache_lock:
+            if self._categories is not None:
+                return list(self._categories)
+            categories = self.get_connection().execute("SELECT cat_id, name, color FROM categories").fetchall()
+            if not self._in_transaction(): self._categories = categories
+            return list(categories)
 
     def add_category(self, name, color):
-        conn = self.get_connection()
-        cursor = conn.cursor()
         try:
-            cursor.execute("INSERT INTO categories (name, color) VALUES (?, ?)", (name, color))
-            conn.commit()
-            return True
-        except:
+            with self.transaction() as conn:
+                conn.execute("INSERT INTO categories (name, color) VALUES (?, ?)", (name, color))
+        except sqlite3.Error:
             return False
-        finally:
-            conn.close()
+        with self._cache_lock:
+            self._categories = None
+            self._changed()
+        return True
 
     def update_category(self, cat_id, new_name, new_color):
-        conn = self.get_connection()
-        cursor = conn.cursor()
         try:
-            # 1. Get old name to update habits
-            cursor.execute("SELECT name FROM categories WHERE cat_id=?", (cat_id,))
-            old_name = cursor.fetchone()[0]
-
-            # 2. Update Category
-            cursor.execute("UPDATE categories SET name=?, color=? WHERE cat_id=?", (new_name, new_color, cat_id))
-            
-            # 3. Sync Habits to new name
-            cursor.execute("UPDATE habits SET category=? WHERE category=?", (new_name, old_name))
-            
-            conn.commit()
-            return True
-        except:
+            with self.transaction() as conn:
+                # 1. Get old name to update habits
+                old_name = conn.execute("SELECT name FROM categories WHERE cat_id=?", (cat_id,)).fetchone()[0]
+
+                # 2. Archived history moves in Python (the rollup trigger only sees daily_logs)
+                if old_name != new_name:
+                    for (h_id,) in conn.execute("SELECT DISTINCT a.habit_id FROM log_archive a JOIN habits h "
+                                                "ON h.habit_id = a.habit_id WHERE h.category = ?", (old_name,)).fetchall():
+                        archive.move_rollup(conn, h_id, old_name, new_name)
+
+                # 3. Update Category
+                conn.execute("UPDATE categories SET name=?, color=? WHERE cat_id=?", (new_name, new_color, cat_id))
+
+                # 4. Sync Habits to new name
+                conn.execute("UPDATE habits SET category=? WHERE category=?", (new_name, old_name))
+        except (sqlite3.Error, TypeError):
             return False
-        finally:
-            conn.close()
+        self.invalidate_cache()  # category rows and habit categories both changed
+        return True
 
     # --- ANALYTICS DATA ---
     def get_category_distribution(self):
         """For Analytics Page: How many habits exist per category"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT category, COUNT(*) FROM habits GROUP BY category")
-        counts = {row[0]: row[1] for row in cursor.fetchall()}
-        
-        cursor.execute("SELECT name, color FROM categories")
-        colors = {row[0]: row[1] for row in cursor.fetchall()}
-        
+        counts = {}
+        for (name, time_str, category, target) in self._cached_habit_meta().values():
+            counts[category] = counts.get(category, 0) + 1
+        colors = {row[1]: row[2] for row in self.get_all_categories()}
+
         data = {}
         for cat, count in counts.items():
-            color = colors.get(cat, "#888888") 
+            color = colors.get(cat, "#888888")
             data[cat] = {"count": count, "color": color}
-        conn.close()
         return data
 
     def get_category_performance(self):
         """For Performance Page: Completion rate today"""
         conn = self.get_connection()
-        cursor = conn.cursor()
         query = """
         SELECT h.category, c.color, 
                COUNT(h.habit_id) as total,
-               SUM(CASE WHEN d.log_id IS NOT NULL THEN 1 ELSE 0 END) as done
+               COUNT(d.habit_id) as done
         FROM habits h
         LEFT JOIN categories c ON h.category = c.name
-        LEFT JOIN daily_logs d ON h.habit_id = d.habit_id AND d.log_date = date('now', 'localtime')
+        LEFT JOIN daily_logs d ON h.habit_id = d.habit_id AND d.day = ?
         GROUP BY h.category
         """
-        cursor.execute(query)
-        rows = cursor.fetchall()
         data = {}
-        for row in rows:
+        for row in conn.execute(query, (to_day(date.today()),)):
             cat_name = row[0]
             color = row[1] if row[1] else "#888888"
             total = row[2]
             done = row[3]
             data[cat_name] = {"total": total, "done": done, "color": color}
-        conn.close()
         return data
 
     # --- CORE HABIT FUNCTIONS ---
     def get_habits(self, category_filter=None):
+        if category_filter and category_filter != "All":
+            return self._habit_rows(lambda h_id, meta: meta[2] == category_filter)
+        return self._habit_rows()
+
+    def get_habit(self, habit_id):
+        """One dashboard row (same shape as get_habits), or None if it was deleted"""
+        rows = self._habit_rows(lambda h_id, meta: h_id == habit_id, habit_id)
+        return rows[0] if rows else None
+
+    def _habit_rows(self, keep=None, habit_id=None):
+        """Cached habit metadata joined with this week's log counts (the only per-refresh query)"""
+        today, week_from, week_to = self._week_days()
+        # Today is always inside the current week, so one indexed range scan gives both columns
+        query = """
+        SELECT habit_id, MAX(day = ?) AS is_done_today, COUNT(*) AS weekly_progress
+        FROM daily_logs WHERE day >= ? AND day < ?
+        """
+        params = [today, week_from, week_to]
+        if habit_id is not None:
+            query += " AND habit_id = ?"
+            params.append(habit_id)
+        counts = {row[0]: row[1:] for row in self.get_connection().execute(query + " GROUP BY habit_id", params)}
+        with self._cache_lock:
+            meta = list(self._cached_habit_meta().items())
+        rows = []
+        for h_id, (name, time_str, category, target) in meta:
+            if keep and not keep(h_id, (name, time_str, category, target)): continue
+            is_done, progress = counts.get(h_id, (0, 0))
+            rows.append((h_id, name, time_str, category, target, is_done, progress))
+        return rows
+
+    def _week_days(self):
+        """(today, first day of this week, first day of next week) as day numbers"""
+        today = date.today()
+        week_from, week_to = week_bounds(today, self.week_start)
+        return to_day(today), to_day(week_from), to_day(week_to)
+
+    def get_habits_page(self, after_id=0, limit=50, category_filter=None):
+        """Keyset page of dashboard rows: the next `limit` habits with habit_id > after_id"""
+        conn = self.get_connection()
+        query = "SELECT habit_id, habit_name, reminder_time, category, weekly_target FROM habits WHERE habit_id > ?"
+        params = [after_id]
+        if category_filter and category_filter != "All":
+            query += " AND category = ?"
+            params.append(category_filter)
+        habits = conn.execute(query + " ORDER BY habit_id LIMIT ?", params + [limit]).fetchall()
+        if not habits: return []
+
+        today, week_from, week_to = self._week_days()
+        # Only this page's id range, via the (habit_id, day) primary key
+        counts = {row[0]: row[1:] for row in conn.execute("""
+            SELECT habit_id, MAX(day = ?), COUNT(*) FROM daily_logs
+            WHERE habit_id BETWEEN ? AND ? AND day >= ? AND day < ?
+            GROUP BY habit_id
+        """, (today, habits[0][0], habits[-1][0], week_from, week_to))}
+        return [h + counts.get(h[0], (0, 0)) for h in habits]
+
+    def get_habit_summary(self, category_filter=None):
+        """(habit count, done today) for the dashboard header"""
         conn = self.get_connection()
-        cursor = conn.cursor()
         query = """
-        SELECT h.habit_id, h.habit_name, h.reminder_time, h.category, h.weekly_target,
-               CASE WHEN d.log_id IS NOT NULL THEN 1 ELSE 0 END as is_done_today,
-               (SELECT COUNT(*) FROM daily_logs dl 
-                WHERE dl.habit_id = h.habit_id 
-                AND strftime('%Y-%W', dl.log_date) = strftime('%Y-%W', 'now', 'localtime')) as weekly_progress
-        FROM habits h
-        LEFT JOIN daily_logs d ON h.habit_id = d.habit_id AND d.log_date = date('now', 'localtime')
+        SELECT COUNT(*), COUNT(d.habit_id) FROM habits h
+        LEFT JOIN daily_logs d ON d.habit_id = h.habit_id AND d.day = ?
         """
-        params = []
+        params = [to_day(date.today())]
         if category_filter and category_filter != "All":
             query += " WHERE h.category = ?"
             params.append(category_filter)
-        cursor.execute(query, params)
-        result = cursor.fetchall()
-        conn.close()
-        return result
+        return tuple(conn.execute(query, params).fetchone())
 
-    def add_habit(self, name, time_str, category, target):
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def add_habit(self, name, time_str, category, target, description=None):
         if time_str == "": time_str = None
-        cursor.execute("INSERT INTO habits (habit_name, reminder_time, category, weekly_target) VALUES (?, ?, ?, ?)", 
-                       (name, time_str, category, target))
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            cursor = conn.execute("INSERT INTO habits (habit_name, reminder_time, category, weekly_target, description) VALUES (?, ?, ?, ?, ?)",
+                                  (name, time_str, category, target, description or None))
+        with self._cache_lock:
+            if self._habit_meta is not None:
+                self._habit_meta[cursor.lastrowid] = (name, time_str, category, target)
+            self._changed()
+        return cursor.lastrowid
 
     def update_habit(self, habit_id, name, time_str, category, target):
-        conn = self.get_connection()
-        cursor = conn.cursor()
         if time_str == "": time_str = None
-        cursor.execute("UPDATE habits SET habit_name=?, reminder_time=?, category=?, weekly_target=? WHERE habit_id=?", 
-                       (name, time_str, category, target, habit_id))
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            old = conn.execute("SELECT category FROM habits WHERE habit_id = ?", (habit_id,)).fetchone()
+            if old: archive.move_rollup(conn, habit_id, old[0], category)
+            conn.execute("UPDATE habits SET habit_name=?, reminder_time=?, category=?, weekly_target=? WHERE habit_id=?", 
+                         (name, time_str, category, target, habit_id))
+        with self._cache_lock:
+            if self._habit_meta is not None and habit_id in self._habit_meta:
+                self._habit_meta[habit_id] = (name, time_str, category, target)
+            self._changed()
 
     def delete_habit(self, habit_id):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM daily_logs WHERE habit_id = ?", (habit_id,))
-        cursor.execute("DELETE FROM habits WHERE habit_id = ?", (habit_id,))
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            archive.remove_from_rollup(conn, habit_id)
+            conn.execute("DELETE FROM daily_logs WHERE habit_id = ?", (habit_id,))
+            conn.execute("DELETE FROM habits WHERE habit_id = ?", (habit_id,))
+        with self._cache_lock:
+            if self._habit_meta is not None:
+                self._habit_meta.pop(habit_id, None)
+            self._changed()
 
     def toggle_habit(self, habit_id, is_checked):
+        with self.transaction() as conn:
+            if is_checked:
+                conn.execute("INSERT OR IGNORE INTO daily_logs (habit_id, day) VALUES (?, ?)", (habit_id, to_day(date.today())))
+            else:
+                conn.execute("DELETE FROM daily_logs WHERE habit_id = ? AND day = ?", (habit_id, to_day(date.today())))
+        self._changed()
+
+    def mark_habits_done(self, habit_ids):
+        """Mark many habits done today in one statement; unknown and already-done ids are skipped"""
+        habit_ids = sorted(set(habit_ids))
+        if not habit_ids: return 0
+        today = to_day(date.today())
+        marked = 0
+        with self.transaction() as conn:
+            for marks, chunk in id_batches(habit_ids):
+                marked += conn.execute(
+                    "INSERT OR IGNORE INTO daily_logs (habit_id, day) SELECT habit_id, ? FROM habits WHERE habit_id IN (%s)"
+                    % marks, [today] + chunk).rowcount
+        self._changed()
+        return marked
+
+    def reset_data(self):
+        """Settings > Danger Zone: wipe habits and logs, keep categories"""
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM daily_logs")
+            conn.execute("DELETE FROM habits")  # triggers clear log_archive and the counters
+            conn.execute("DELETE FROM daily_rollup")  # including archived days
+        with self._cache_lock:
+            self._habit_meta = {}
+            self._changed()
+
+    def get_streaks(self, habit_ids=None):
+        """Current and longest streak for many habits in one set-based pass.
+
+        Returns {habit_id: {"current": n, "longest": m}}. habit_ids=None means every habit.
+        """
         conn = self.get_connection()
-        cursor = conn.cursor()
-        if is_checked:
-            cursor.execute("INSERT OR IGNORE INTO daily_logs (habit_id, log_date) VALUES (?, date('now', 'localtime'))", (habit_id,))
+        # Gaps-and-islands: consecutive days share the same (day - row_number) value.
+        # (habit_id, day) is the primary key, so rows arrive unique and already in order.
+        query = """
+        WITH islands AS (
+            SELECT habit_id, day, day - ROW_NUMBER() OVER (PARTITION BY habit_id ORDER BY day) AS grp
+            FROM daily_logs {where}
+        )
+        SELECT habit_id, MAX(day) AS last_day, COUNT(*) AS length
+        FROM islands GROUP BY habit_id, grp
+        """
+        if habit_ids is None:
+            rows = conn.execute(query.format(where="")).fetchall()
         else:
-            cursor.execute("DELETE FROM daily_logs WHERE habit_id = ? AND log_date = date('now', 'localtime')", (habit_id,))
-        conn.commit()
-        conn.close()
+            habit_ids = list(habit_ids)
+            rows = []
+            for marks, chunk in id_batches(habit_ids):
+                rows.extend(conn.execute(query.format(where="WHERE habit_id IN (%s)" % marks), chunk).fetchall())
+        # Runs in the bitmap archive join up with the live ones
+        archived = archive.islands(conn, habit_ids)
+        if archived: rows = archive.merge_islands(rows, archived)
 
-    def get_streak(self, habit_id):
+        return streaks_from_islands(rows, to_day(date.today()), habit_ids)
+
+    def get_activity_data(self, start=None, end=None):
+        """{'YYYY-MM-DD': completions} from the rollup, optionally limited to [start, end]"""
         conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT DISTINCT log_date FROM daily_logs WHERE habit_id = ? ORDER BY log_date DESC", (habit_id,))
-        dates_str = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        dates = []
-        for d_str in dates_str:
-            try: dates.append(datetime.strptime(d_str, "%Y-%m-%d").date())
-            except: pass
-        if not dates: return 0
-        streak = 0
-        current = date.today()
-        today_str = current.strftime("%Y-%m-%d")
-        if today_str in dates_str: 
-            streak += 1
-            current -= timedelta(days=1)
-        elif (current - timedelta(days=1)).strftime("%Y-%m-%d") in dates_str:
-            current -= timedelta(days=1)
-        else: return 0
-        for i in range(len(dates)):
-            check_date = current.strftime("%Y-%m-%d")
-            if check_date in dates_str:
-                if check_date != date.today().strftime("%Y-%m-%d"):
-                    streak += 1
-                current -= timedelta(days=1)
-            else: break
-        return streak
-
-    def get_activity_data(self):
+        query = "SELECT day, SUM(completions) FROM daily_rollup"
+        params = []
+        if start or end:
+            query += " WHERE day BETWEEN ? AND ?"
+            params = [to_day(start) if start else -(1 << 62), to_day(end) if end else 1 << 62]
+        cursor = conn.execute(query + " GROUP BY day", params)
+        return {from_day(day).isoformat(): n for day, n in cursor.fetchall()}
+
+    def get_category_activity(self, start, end):
+        """{category: {'YYYY-MM-DD': completions}} for [start, end], for trend charts"""
         conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT log_date, COUNT(*) FROM daily_logs GROUP BY log_date")
-        data = {str(row[0]): row[1] for row in cursor.fetchall()}
-        conn.close()
+        data = {}
+        cursor = conn.execute("SELECT category, day, completions FROM daily_rollup WHERE day BETWEEN ? AND ?",
+                              (to_day(start), to_day(end)))
+        for category, day, completions in cursor:
+            data.setdefault(category, {})[from_day(day).isoformat()] = completions
         return data
-        
+
+    def get_log_days(self, start=None):
+        """Live rows plus the days unpacked from log_archive"""
+        start = to_day(start) if start else None
+        with self.transaction() as conn:
+            if start is not None:
+                rows = conn.execute("SELECT habit_id, day FROM daily_logs WHERE day >= ?", (start,)).fetchall()
+            else:
+                rows = conn.execute("SELECT habit_id, day FROM daily_logs").fetchall()
+            rows.extend(archive.log_days(conn, start))
+        return rows
+
+    def rebuild_rollup(self):
+        with self.transaction() as conn:
+            archive.rebuild_rollup(conn)
+        self._changed()
+
+    def rebuild_stats(self):
+        with self.transaction() as conn:
+            archive.rebuild_stats(conn)
+        self._changed()
+
+    def compact_archive(self, keep_years=KEEP_YEARS):
+        """Fold logs older than January 1st `keep_years` years ago into log_archive.
+        Returns the number of rows folded."""
+        if keep_years < 1:
+            raise ValueError("keep_years must be at least 1 (this week's rows have to stay live)")
+        with self.transaction() as conn:
+            folded, _ = archive.compact(conn, archive.year_start(date.today().year - keep_years))
+        self._changed()
+        return folded
+
     def get_total_completions(self):
+        """Maintained by triggers (see migrations.STATS_TRIGGERS), so this is one row read"""
+        row = self.get_connection().execute("SELECT value FROM stats WHERE key = 'total_completions'").fetchone()
+        return row[0] if row else 0
+
+    def get_habit_completions(self, habit_ids=None):
+        """{habit_id: all-time completions} from the habit_stats counters"""
         conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM daily_logs")
-        try: count = cursor.fetchone()[0]
-        except: count = 0
-        conn.close()
-        return count
\ No newline at end of file
+        if habit_ids is None:
+            return dict(conn.execute("SELECT habit_id, completions FROM habit_stats").fetchall())
+        habit_ids = list(habit_ids)
+        counts = dict.fromkeys(habit_ids, 0)
+        for marks, chunk in id_batches(habit_ids):
+            counts.update(conn.execute("SELECT habit_id, completions FROM habit_stats WHERE habit_id IN (%s)" % marks,
+                                       chunk).fetchall())
+        return counts
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="QuestLog database maintenance")
+    parser.add_argument("command", choices=["rebuild-rollup", "rebuild-stats", "compact", "vacuum"])
+    parser.add_argument("--db", default="habits.db", help="path to the SQLite file (default: habits.db)")
+    parser.add_argument("--keep-years", type=int, default=KEEP_YEARS,
+                        help="compact: full years to keep as rows before this one (default: %(default)s)")
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    if args.command == "rebuild-rollup":
+        db.rebuild_rollup()
+        print("daily_rollup rebuilt.")
+    elif args.command == "rebuild-stats":
+        db.rebuild_stats()
+        print(f"Completion counters rebuilt ({db.get_total_completions()} total).")
+    elif args.command == "compact":
+        folded = db.compact_archive(args.keep_years)
+        print(f"Folded {folded} log rows into the archive. Run 'vacuum' to shrink the file.")
+    elif args.command == "vacuum":
+        # Reclaims the pages freed by migrations such as the switch to integer days
+        db.get_connection().execute("VACUUM")
+        print("Database compacted.")
+    db.close()
@@ -0,0 +1,84 @@
+import queue
+import tkinter
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+# Database methods that modify data. They all run on one writer thread, in submit order.
+WRITE_METHODS = {
+    "add_category", "update_category",
+    "add_habit", "update_habit", "delete_habit", "toggle_habit", "mark_habits_done",
+    "reset_data", "rebuild_rollup", "rebuild_stats", "compact_archive",
+}
+POLL_MS = 15  # how often the Tk thread checks for finished queries while any are in flight
+
+class DatabaseWorker:
+    """Async facade over Database so the Tk main loop never waits on SQLite.
+
+    call()/submit() return a concurrent.futures.Future. If on_done/on_error are
+    given they are invoked later on the Tk thread (via root.after), so they may
+    touch widgets. Callbacks must be registered from the Tk thread; background
+    threads should just wait on the returned future.
+    """
+    def __init__(self, db, root, readers=3):
+        self.db = db
+        self.root = root
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="db-reader")
+        self._results = queue.Queue()
+        self._in_flight = 0  # callbacks not yet delivered (Tk thread only)
+        self._pumping = False
+        self._closed = threading.Event()
+
+    def open(self, factory, on_done=None, on_error=None):
+        """Create the database on the writer thread (connection, migrations) so the window
+        can paint first. Sets self.db; use on_done before issuing calls."""
+        def run():
+            self.db = factory()
+            return self.db
+        return self.submit(run, write=True, on_done=on_done, on_error=on_error)
+
+    def call(self, method, *args, on_done=None, on_error=None):
+        """Run db.<method>(*args) on the writer or a reader thread, depending on the method"""
+        return self.submit(getattr(self.db, method), *args, write=method in WRITE_METHODS,
+                           on_done=on_done, on_error=on_error)
+
+    def submit(self, fn, *args, write=False, on_done=None, on_error=None):
+        """Run an arbitrary job. Use write=True for anything that writes, or that must
+        observe earlier writes (e.g. write-then-read sequences)."""
+        pool = self._writer if write else self._readers
+        future = pool.submit(fn, *args)
+        if on_done or on_error:
+            self._in_flight += 1
+            future.add_done_callback(lambda f: self._results.put((f, on_done, on_error)))
+            self._schedule_pump()
+        return future
+
+    def _schedule_pump(self):
+        if not self._pumping and not self._closed.is_set():
+            self._pumping = True
+            self.root.after(POLL_MS, self._pump)
+
+    def _pump(self):
+        self._pumping = False
+        while True:
+            try: future, on_done, on_error = self._results.get_nowait()
+            except queue.Empty: break
+            self._in_flight -= 1
+            try:
+                error = future.exception()
+                if error is None:
+                    if on_done: on_done(future.result())
+                elif on_error: on_error(error)
+                else: print(f"Database error: {error}")
+            except tkinter.TclError:
+                pass  # the widget that asked was destroyed while the query was running
+            except Exception:
+                traceback.print_exc()  # keep delivering the other results
+        if self._in_flight:
+            self._schedule_pump()
+
+    def shutdown(self):
+        self._closed.set()
+        self._readers.shutdown(wait=False, cancel_futures=True)
+        self._writer.shutdown(wait=True)  # let pending writes land
@@ -0,0 +1,27 @@
+"""XP and level thresholds. Add a row to LEVELS to add a level."""
+from bisect import bisect_right
+
+XP_PER_COMPLETION = 10
+# (XP needed to reach the level, title); level numbers start at 1
+LEVELS = [
+    (0, "Novice"),
+    (100, "Apprentice"),
+    (300, "Hustler"),
+    (600, "Master"),
+    (1000, "God Mode"),
+]
+MAX_LEVEL_XP = 5000  # XP bar target once the last level is reached
+CYBERPUNK_LEVEL = 5  # level that unlocks the Cyberpunk theme
+
+_THRESHOLDS = [xp for xp, title in LEVELS]
+
+
+def level_for(total_xp):
+    """(level, next_level_xp) for an XP total"""
+    index = max(bisect_right(_THRESHOLDS, total_xp) - 1, 0)
+    next_xp = _THRESHOLDS[index + 1] if index + 1 < len(LEVELS) else MAX_LEVEL_XP
+    return index + 1, next_xp
+
+
+def title_for(level):
+    return LEVELS[level - 1][1] if 1 <= level <= len(LEVELS) else "Legend"
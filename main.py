@@ -1,16 +1,32 @@
-import customtkinter as ctk
-import threading
+import sys
 import time
+_started = time.perf_counter()
+
+import profiling
+startup = profiling.StartupTimer("--profile-startup" in sys.argv, _started)
+startup.mark("import profiling")
+
+import customtkinter as ctk
 import os
-from plyer import notification
-from datetime import datetime
+import threading
+from datetime import datetime, date
+startup.mark("import customtkinter")
 
 # Import Custom Modules
-from database import Database
-from components import HabitCard, Sidebar, resource_path
-from clock_widget import RealTimeClock 
+# (analytics, trends/NumPy, plyer and playsound are imported on first use)
+from storage import open_backend
+from db_worker import DatabaseWorker
+from components import VirtualHabitList, Sidebar, resource_path
+from clock_widget import RealTimeClock, TickService
 from sounds import SoundManager
-from analytics import AnalyticsPanel, PerformancePanel
+from reminders import ReminderScheduler
+import levels
+startup.mark("import app modules")
+
+def notify(**kwargs):
+    # plyer picks a platform backend on import; load it when the first notification is sent
+    from plyer import notification
+    notification.notify(**kwargs)
 
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("green")
@@ -28,7 +44,8 @@ class App(ctk.CTk):
         except Exception:
             pass # Fails gracefully if no icon found
 
-        self.db = Database()
+        self.db = None  # opened on the worker after the first frame, see finish_startup()
+        self.worker = DatabaseWorker(None, self)
         self.sound = SoundManager()
         
         self.total_xp = 0
@@ -36,80 +53,143 @@ class App(ctk.CTk):
         self.next_level_xp = 100
         self.editing_id = None
         self.current_filter = "All"
-        
-        self.stop_thread = False
-        self.thread = threading.Thread(target=self.run_scheduler, daemon=True)
-        self.thread.start()
+        self.pages = {}  # page name -> (frame, (data_version, day, ...) it was built from)
+        self.current_page = None
+        self.today = date.today()
+        self.reminders = ReminderScheduler()
+        # One minute-aligned timer drives the clock, the day rollover and reminders
+        self.ticks = TickService(self)
+        self.ticks.subscribe(self.on_tick)
 
         self.grid_columnconfigure(1, weight=1)
         self.grid_rowconfigure(0, weight=1)
         
-        self.calculate_xp()
-        self.sidebar = None
-        self.refresh_sidebar()
+        self.sidebar = Sidebar(self, self.navigate, self.total_xp, self.level, self.next_level_xp, self.change_theme)
+        self.sidebar.grid(row=0, column=0, sticky="nsew")
 
         self.main_area = ctk.CTkFrame(self, fg_color="transparent")
         self.main_area.grid(row=0, column=1, sticky="nsew", padx=30, pady=30)
-        
+        ctk.CTkLabel(self.main_area, text="Loading quests...", text_color="grey").pack(pady=40)
+
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        startup.mark("App window")
+        # after_idle runs once the pending redraws are done, i.e. after the first frame
+        self.after_idle(lambda: self.after(0, self.finish_startup))
+
+    def finish_startup(self):
+        """Everything that can wait until the window is on screen"""
+        startup.mark("first frame")
+        self.worker.open(lambda: open_backend(week_start=os.getenv("QUESTLOG_WEEK_START", "monday")),
+                         on_done=self.on_db_ready, on_error=self.on_db_error)
+        self.ticks.start()
+
+    def on_db_ready(self, db):
+        startup.mark("database open")
+        self.db = db
+        self.worker.call("get_habits", "All", on_done=self.reminders.sync)
+        self.calculate_xp()
         self.show_dashboard()
+        startup.mark("dashboard")
+        if startup.enabled: print(startup.report(), file=sys.stderr)
+
+    def on_db_error(self, error):
+        """The store could not be opened (bad setting, locked file, failed migration)"""
+        self.clear_frame()
+        ctk.CTkLabel(self.main_area, text="Could not open the database", text_color="#e74c3c",
+                     font=("Segoe UI", 20, "bold")).pack(pady=(40, 10))
+        ctk.CTkLabel(self.main_area, text=f"{type(error).__name__}: {error}", text_color="grey",
+                     wraplength=600, justify="left").pack(pady=5)
+        ctk.CTkButton(self.main_area, text="Quit", fg_color="#c0392b", command=self.on_close).pack(pady=20)
+
+    def on_close(self):
+        self.ticks.stop()
+        self.worker.shutdown()
+        if self.db: self.db.close()
+        self.destroy()
 
     def calculate_xp(self):
-        completions = self.db.get_total_completions()
-        self.total_xp = completions * 10
-        if self.total_xp < 100: self.level = 1; self.next_level_xp = 100
-        elif self.total_xp < 300: self.level = 2; self.next_level_xp = 300
-        elif self.total_xp < 600: self.level = 3; self.next_level_xp = 600
-        elif self.total_xp < 1000: self.level = 4; self.next_level_xp = 1000
-        else: self.level = 5; self.next_level_xp = 5000
-
-    def refresh_sidebar(self):
-        if self.sidebar: self.sidebar.destroy()
-        self.sidebar = Sidebar(self, self.navigate, self.total_xp, self.level, self.next_level_xp, self.change_theme)
-        self.sidebar.grid(row=0, column=0, sticky="nsew")
+        # Queued behind pending writes so a fresh toggle is already counted
+        self.worker.submit(self.db.get_total_completions, write=True, on_done=self.apply_xp)
+
+    def apply_xp(self, completions):
+        self.total_xp = completions * levels.XP_PER_COMPLETION
+        self.level, self.next_level_xp = levels.level_for(self.total_xp)
+        self.sidebar.update_stats(self.total_xp, self.level, self.next_level_xp)
 
     def change_theme(self, theme_name):
         if theme_name == "cyberpunk":
             ctk.set_default_color_theme("dark-blue") 
-            notification.notify(title="Theme Unlocked!", message="Cyberpunk mode active.", timeout=3)
-
-    def run_scheduler(self):
-        while not self.stop_thread:
-            current_time = datetime.now().strftime("%H:%M")
-            try:
-                habits = self.db.get_habits(category_filter="All")
-                for (h_id, name, remind_time, cat, target, is_done, progress) in habits:
-                    if remind_time and not is_done:
-                        if remind_time == current_time:
-                            self.sound.play_notification()
-                            notification.notify(title="Quest Alert!", message=f"Time to complete: {name}", timeout=10)
-                            time.sleep(60)
-            except: pass
-            time.sleep(10)
+            notify(title="Theme Unlocked!", message="Cyberpunk mode active.", timeout=3)
+
+    def on_tick(self, now):
+        due = self.reminders.pop_due(now)
+        if due:
+            # Notifications can block for a moment (plyer backends); keep them off the Tk thread
+            threading.Thread(target=self.fire_reminders, args=(due,), daemon=True).start()
+        if now.date() != self.today:
+            # Midnight: yesterday's ticks are no longer "done today"
+            self.today = now.date()
+            if self.current_page == "dashboard": self.show_dashboard()  # the day in its key changed
+
+    def fire_reminders(self, due):
+        """Called on a short-lived thread with every (habit_id, name) due right now"""
+        self.sound.play_notification()
+        if len(due) <= 3:
+            for h_id, name in due:
+                notify(title="Quest Alert!", message=f"Time to complete: {name}", timeout=10)
+        else:
+            names = ", ".join(name for h_id, name in due[:3])
+            notify(title="Quest Alert!", message=f"{len(due)} quests due: {names}...", timeout=10)
 
     def navigate(self, page_name):
+        if self.db is None: return  # still starting up
         if page_name == "dashboard": self.show_dashboard()
         elif page_name == "analytics": self.show_analytics()
         elif page_name == "performance": self.show_performance()
+        elif page_name == "trends": self.show_trends()
         elif page_name == "settings": self.open_settings_modal()
 
+    # --- PAGES ---
+    def show_page(self, name, build, *key):
+        """Show page `name`, reusing its widgets while what they show can't have changed:
+        same data_version, same day and same extra `key`. Otherwise build(frame) it anew."""
+        key = (self.db.data_version, date.today()) + key
+        page, built_for = self.pages.get(name, (None, None))
+        if page is not None and (built_for != key or not page.winfo_exists()):
+            page.destroy()
+            page = None
+        kept = {p for p, _ in self.pages.values()}
+        for child in self.main_area.winfo_children():
+            if child is page: continue
+            if child in kept: child.pack_forget()
+            else: child.destroy()  # placeholders
+        if page is None:
+            page = ctk.CTkFrame(self.main_area, fg_color="transparent")
+            build(page)
+            self.pages[name] = (page, key)
+        page.pack(fill="both", expand=True)
+        self.current_page = name
+
     def show_dashboard(self):
-        self.clear_frame()
+        self.show_page("dashboard", self.build_dashboard, self.current_filter)
+
+    def build_dashboard(self, page):
         # Header
-        header = ctk.CTkFrame(self.main_area, fg_color="transparent")
+        header = ctk.CTkFrame(page, fg_color="transparent")
         header.pack(fill="x", pady=(0, 10))
         ctk.CTkLabel(header, text="Current Quests", font=("Segoe UI", 32, "bold")).pack(side="left")
-        RealTimeClock(header).pack(side="left", padx=20)
+        RealTimeClock(header, self.ticks).pack(side="left", padx=20)
 
         # Controls
-        ctrl = ctk.CTkFrame(self.main_area, fg_color="#2b2b2b", corner_radius=10)
+        ctrl = ctk.CTkFrame(page, fg_color="#2b2b2b", corner_radius=10)
         ctrl.pack(fill="x", pady=(0, 20), ipady=5)
         self.name_entry = ctk.CTkEntry(ctrl, placeholder_text="New Quest Name...", width=200)
         self.name_entry.pack(side="left", padx=(15, 5), pady=10)
         
-        self.cats_data = self.db.get_all_categories() 
-        self.cat_names = [c[1] for c in self.cats_data]
-        self.cat_var = ctk.StringVar(value=self.cat_names[0] if self.cat_names else "General")
-        self.cat_menu = ctk.CTkComboBox(ctrl, values=self.cat_names, variable=self.cat_var, width=110, state="readonly")
+        self.cats_data = []
+        self.cat_names = []
+        self.cat_var = ctk.StringVar(value="General")
+        self.cat_menu = ctk.CTkComboBox(ctrl, values=["General"], variable=self.cat_var, width=110, state="readonly")
         self.cat_menu.pack(side="left", padx=5)
 
         ctk.CTkButton(ctrl, text="+", width=30, fg_color="#444", command=self.open_new_category_modal).pack(side="left", padx=2)
@@ -127,23 +207,31 @@ class App(ctk.CTk):
         self.action_btn.pack(side="left", padx=15)
         self.cancel_btn = ctk.CTkButton(ctrl, text="✕", width=30, fg_color="#444", command=self.cancel_edit)
 
-        # Filters
-        filters = ctk.CTkScrollableFrame(self.main_area, fg_color="transparent", height=50, orientation="horizontal")
-        filters.pack(fill="x", pady=(0, 10))
-        for cat in ["All"] + self.cat_names:
-            col = "#2CC985" if self.current_filter == cat else "transparent"
-            txt = "white" if self.current_filter == cat else "grey"
-            ctk.CTkButton(filters, text=cat, width=60, height=25, fg_color=col, text_color=txt, corner_radius=20, 
-                          command=lambda c=cat: self.set_filter(c)).pack(side="left", padx=5)
+        # Filters (buttons added once categories arrive)
+        self.filters = ctk.CTkScrollableFrame(page, fg_color="transparent", height=50, orientation="horizontal")
+        self.filters.pack(fill="x", pady=(0, 10))
 
         # List
-        self.progress = ctk.CTkProgressBar(self.main_area, height=10, corner_radius=8)
+        self.progress = ctk.CTkProgressBar(page, height=10, corner_radius=8)
         self.progress.pack(fill="x", pady=(0, 15))
         self.progress.set(0)
-        self.scroll_frame = ctk.CTkScrollableFrame(self.main_area, fg_color="transparent")
-        self.scroll_frame.pack(fill="both", expand=True)
+        self.habit_list = VirtualHabitList(page, self.load_page,
+                                           self.toggle_habit, self.delete_habit_event, self.start_edit_event)
+        self.habit_list.pack(fill="both", expand=True)
+        self.worker.call("get_all_categories", on_done=self.populate_categories)
         self.load_habits_list()
 
+    def populate_categories(self, cats_data):
+        self.cats_data = cats_data
+        self.cat_names = [c[1] for c in cats_data]
+        self.cat_menu.configure(values=self.cat_names)
+        if self.cat_names: self.cat_var.set(self.cat_names[0])
+        for cat in ["All"] + self.cat_names:
+            col = "#2CC985" if self.current_filter == cat else "transparent"
+            txt = "white" if self.current_filter == cat else "grey"
+            ctk.CTkButton(self.filters, text=cat, width=60, height=25, fg_color=col, text_color=txt, corner_radius=20, 
+                          command=lambda c=cat: self.set_filter(c)).pack(side="left", padx=5)
+
     # --- MODALS ---
     def open_new_category_modal(self): self.open_category_form(is_edit=False)
     def open_manage_categories_modal(self):
@@ -182,9 +270,8 @@ class App(ctk.CTk):
             name = entry.get()
             col = colors.get(color_var.get(), "#FFF")
             if name:
-                if is_edit: self.db.update_category(cat_id, name, col)
-                else: self.db.add_category(name, col)
-                self.show_dashboard()
+                if is_edit: self.worker.call("update_category", cat_id, name, col, on_done=lambda ok: self.show_dashboard())
+                else: self.worker.call("add_category", name, col, on_done=lambda ok: self.show_dashboard())
                 top.destroy()
         ctk.CTkButton(top, text="Save", command=save, fg_color="#2CC985").pack(pady=20)
 
@@ -206,35 +293,95 @@ class App(ctk.CTk):
         sound_btn = ctk.CTkButton(sound_frame, text=current_text, width=80, fg_color=current_col, command=toggle_sound)
         sound_btn.pack(side="right")
 
+        if profiling.ENABLED:
+            ctk.CTkButton(top, text="📊 Query Stats", fg_color="#444", command=self.open_query_stats).pack(pady=(10, 0))
+
         ctk.CTkLabel(top, text="Danger Zone", text_color="#e74c3c", font=("Arial", 12, "bold")).pack(pady=(20, 5))
         def reset_data():
-            conn = self.db.get_connection()
-            conn.execute("DELETE FROM daily_logs"); conn.execute("DELETE FROM habits"); conn.commit(); conn.close()
-            self.total_xp = 0; self.calculate_xp(); self.refresh_sidebar(); self.show_dashboard()
+            def on_reset(_):
+                self.reminders.sync([])
+                self.total_xp = 0; self.calculate_xp(); self.show_dashboard()
+            self.worker.call("reset_data", on_done=on_reset)
             top.destroy()
-            notification.notify(title="System Reset", message="Data wiped.", timeout=3)
+            notify(title="System Reset", message="Data wiped.", timeout=3)
         ctk.CTkButton(top, text="☢️ RESET ALL DATA", fg_color="#c0392b", hover_color="#e74c3c", command=reset_data).pack(pady=10)
 
+    def open_query_stats(self):
+        """Debug panel for QUESTLOG_PROFILE=1: per-method/per-statement timings and slow queries"""
+        top = ctk.CTkToplevel(self)
+        top.title("Query Stats")
+        top.geometry("900x600")
+        top.attributes("-topmost", True)
+        box = ctk.CTkTextbox(top, font=("Consolas", 11), wrap="none")
+        def refresh():
+            box.configure(state="normal")
+            box.delete("1.0", "end")
+            box.insert("1.0", profiling.stats.report())
+            box.configure(state="disabled")
+        def reset():
+            profiling.stats.reset(); refresh()
+        btns = ctk.CTkFrame(top, fg_color="transparent")
+        btns.pack(fill="x", padx=10, pady=(10, 0))
+        ctk.CTkButton(btns, text="Refresh", width=80, command=refresh).pack(side="left")
+        ctk.CTkButton(btns, text="Reset", width=80, fg_color="#444", command=reset).pack(side="left", padx=10)
+        box.pack(fill="both", expand=True, padx=10, pady=10)
+        refresh()
+
     # --- CORE FUNCTIONS ---
     def set_filter(self, category):
         self.current_filter = category
         self.show_dashboard()
 
     def load_habits_list(self):
-        for w in self.scroll_frame.winfo_children(): w.destroy()
-        habits = self.db.get_habits(self.current_filter)
-        cats_data = self.db.get_all_categories()
-        color_map = {cat[1]: cat[2] for cat in cats_data}
-        done = 0
-        for (h_id, name, remind_time, category, target, is_done, progress) in habits:
-            streak = self.db.get_streak(h_id)
-            if is_done: done += 1
-            disp_time = remind_time if remind_time else ""
-            card_col = color_map.get(category, "#888")
-            HabitCard(self.scroll_frame, h_id, name, disp_time, category, card_col, target, progress, is_done, streak, 
-                      self.toggle_habit, self.delete_habit_event, self.start_edit_event).pack(fill="x", pady=6)
-        if len(habits) > 0: self.progress.set(done / len(habits))
-        else: self.progress.set(0)
+        """Restart the virtual list from the first page (rows are fetched as they scroll into view)"""
+        category = self.current_filter
+        def job():
+            return category, self.db.get_habit_summary(category), self.db.get_all_categories()
+        self.worker.submit(job, on_done=self.apply_habits_list)
+
+    def apply_habits_list(self, result):
+        category, summary, cats_data = result
+        # Ignore answers for a list the user already navigated away from
+        if category != self.current_filter or not self.habit_list.winfo_exists(): return
+        self.habit_list.color_map = {cat[1]: cat[2] for cat in cats_data}
+        self.habit_list.reset(summary[0])
+        self.update_progress(summary)
+
+    def load_page(self, after_id, limit, on_done):
+        """Keyset page for the virtual list: rows after `after_id` plus their streaks"""
+        category = self.current_filter
+        def job():
+            rows = self.db.get_habits_page(after_id, limit, category)
+            return rows, self.db.get_streaks([r[0] for r in rows])
+        self.worker.submit(job, on_done=on_done)
+
+    def refresh_habit(self, h_id):
+        """Re-read a single habit and patch (or add/remove) just its row"""
+        category = self.current_filter
+        def job():
+            return self.db.get_habit(h_id), self.db.get_streak(h_id), self.db.get_habit_summary(category)
+        # Runs on the writer so it always sees the write that triggered it
+        self.worker.submit(job, write=True, on_done=lambda result: self.apply_habit(h_id, *result))
+
+    def apply_habit(self, h_id, row, streak, summary):
+        if row is None: self.reminders.remove(h_id)
+        else: self.reminders.update(h_id, row[1], row[2], row[5])
+        if not self.habit_list.winfo_exists(): return
+        if row is None or (self.current_filter != "All" and row[3] != self.current_filter):
+            self.habit_list.remove_row(h_id)
+        elif self.habit_list.has(h_id):
+            self.habit_list.update_row(row, streak)
+        else:
+            self.habit_list.append_row(row, streak)
+        self.update_progress(summary)
+        # The list is patched in place for its own writes, so it's current again: reuse it next visit
+        page = self.pages.get("dashboard", (None, None))[0]
+        if page is not None:
+            self.pages["dashboard"] = (page, (self.db.data_version, date.today(), self.current_filter))
+
+    def update_progress(self, summary):
+        total, done = summary
+        self.progress.set(done / total if total else 0)
 
     def save_habit_event(self):
         name = self.name_entry.get()
@@ -245,9 +392,14 @@ class App(ctk.CTk):
         try: valid_time = datetime.strptime(time_val, "%H:%M").strftime("%H:%M") if time_val else ""
         except: valid_time = ""
         if name:
-            if self.editing_id: self.db.update_habit(self.editing_id, name, valid_time, cat, target); self.cancel_edit()
-            else: self.db.add_habit(name, valid_time, cat, target); self.name_entry.delete(0, "end"); self.time_entry.delete(0, "end")
-            self.load_habits_list()
+            if self.editing_id:
+                h_id = self.editing_id
+                self.worker.call("update_habit", h_id, name, valid_time, cat, target)
+                self.cancel_edit()
+                self.refresh_habit(h_id)
+            else:
+                self.worker.call("add_habit", name, valid_time, cat, target, on_done=self.refresh_habit)
+                self.name_entry.delete(0, "end"); self.time_entry.delete(0, "end")
 
     def start_edit_event(self, h_id, name, time_val, category, target):
         self.editing_id = h_id
@@ -265,21 +417,28 @@ class App(ctk.CTk):
         self.freq_var.set("Daily"); self.action_btn.configure(text="+ Add", fg_color="#2CC985"); self.cancel_btn.pack_forget()
 
     def toggle_habit(self, h_id, is_checked):
-        self.db.toggle_habit(h_id, is_checked)
         if is_checked: self.sound.play_success()
-        self.calculate_xp(); self.refresh_sidebar(); self.load_habits_list()
+        self.worker.call("toggle_habit", h_id, is_checked)
+        self.refresh_habit(h_id); self.calculate_xp()
 
     def delete_habit_event(self, h_id):
-        self.db.delete_habit(h_id)
         if self.editing_id == h_id: self.cancel_edit()
-        self.calculate_xp(); self.refresh_sidebar(); self.load_habits_list()
+        self.habit_list.remove_row(h_id); self.reminders.remove(h_id)
+        self.worker.call("delete_habit", h_id, on_done=lambda _: self.calculate_xp())
+        self.refresh_habit(h_id)  # progress bar
 
-    def show_analytics(self): 
-        self.clear_frame(); AnalyticsPanel(self.main_area, self.db).pack(fill="both", expand=True)
+    def show_analytics(self):
+        from analytics import AnalyticsPanel
+        self.show_page("analytics", lambda page: AnalyticsPanel(page, self.worker).pack(fill="both", expand=True))
     def show_performance(self):
-        self.clear_frame(); PerformancePanel(self.main_area, self.db).pack(fill="both", expand=True)
+        from analytics import PerformancePanel
+        self.show_page("performance", lambda page: PerformancePanel(page, self.worker).pack(fill="both", expand=True))
+    def show_trends(self):
+        from analytics import TrendsPanel
+        self.show_page("trends", lambda page: TrendsPanel(page, self.worker).pack(fill="both", expand=True))
     def clear_frame(self):
         for w in self.main_area.winfo_children(): w.destroy()
+        self.pages, self.current_page = {}, None
 
 if __name__ == "__main__":
     app = App()
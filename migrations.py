@@ -0,0 +1,273 @@
+"""Versioned schema migrations for habits.db.
+
+The applied version is stored in PRAGMA user_version. Each migration runs once,
+inside its own transaction, and is written so re-running it is harmless.
+To change the schema append a new (version, description, function) entry to
+MIGRATIONS - never edit one that has already shipped.
+"""
+
+JULIAN_EPOCH = 2440587.5  # julianday('1970-01-01'); dates are stored as days since then
+
+
+def _unique_daily_logs(conn):
+    # Keep the oldest row of every (habit, day) pair, then make duplicates impossible
+    conn.execute("""
+        DELETE FROM daily_logs
+        WHERE log_id NOT IN (SELECT MIN(log_id) FROM daily_logs GROUP BY habit_id, log_date)
+    """)
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_logs_habit_date ON daily_logs(habit_id, log_date)")
+
+
+# Secondary indexes on daily_logs; bulk imports drop and rebuild them (see transfer.py).
+# The SQL is templated on the day column: `log_date` (TEXT) before migration 6, `day`
+# (INTEGER epoch days) after, so older migrations replay exactly as they shipped.
+LOG_INDEXES = {
+    # get_activity_data / get_category_performance: group and filter by day, read habit_id from the index
+    "idx_logs_date_habit": "CREATE INDEX IF NOT EXISTS idx_logs_date_habit ON daily_logs({day}, habit_id)",
+}
+
+
+def create_log_indexes(conn, day="day"):
+    for sql in LOG_INDEXES.values():
+        conn.execute(sql.format(day=day))
+
+
+def drop_log_indexes(conn):
+    for name in LOG_INDEXES:
+        conn.execute("DROP INDEX IF EXISTS %s" % name)
+
+
+def _covering_indexes(conn):
+    create_log_indexes(conn, "log_date")
+    # get_habits(category_filter) and the per-category analytics
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_habits_category ON habits(category, habit_id)")
+
+
+# --- DAILY ROLLUP ---
+# daily_rollup holds completions per (day, category) and is kept current by triggers,
+# so heatmaps and trends read a few bounded rows instead of scanning daily_logs.
+# Habits without a category are rolled up under ''.
+ROLLUP_TRIGGERS = {
+    "trg_rollup_log_insert": """
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_log_insert AFTER INSERT ON daily_logs BEGIN
+            INSERT INTO daily_rollup ({day}, category, completions)
+            VALUES (NEW.{day}, COALESCE((SELECT category FROM habits WHERE habit_id = NEW.habit_id), ''), 1)
+            ON CONFLICT({day}, category) DO UPDATE SET completions = completions + 1;
+        END""",
+    "trg_rollup_log_delete": """
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_log_delete AFTER DELETE ON daily_logs BEGIN
+            UPDATE daily_rollup SET completions = completions - 1
+            WHERE {day} = OLD.{day}
+              AND category = COALESCE((SELECT category FROM habits WHERE habit_id = OLD.habit_id), '');
+            DELETE FROM daily_rollup WHERE {day} = OLD.{day} AND completions <= 0;
+        END""",
+    # Move a habit's history when its category changes (also covers category renames)
+    "trg_rollup_habit_category": """
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_habit_category AFTER UPDATE OF category ON habits
+        WHEN OLD.category IS NOT NEW.category BEGIN
+            UPDATE daily_rollup SET completions = completions - 1
+            WHERE category = COALESCE(OLD.category, '')
+              AND {day} IN (SELECT {day} FROM daily_logs WHERE habit_id = NEW.habit_id);
+            DELETE FROM daily_rollup WHERE category = COALESCE(OLD.category, '') AND completions <= 0;
+            INSERT INTO daily_rollup ({day}, category, completions)
+            SELECT {day}, COALESCE(NEW.category, ''), 1 FROM daily_logs WHERE habit_id = NEW.habit_id
+            ON CONFLICT({day}, category) DO UPDATE SET completions = completions + 1;
+        END""",
+    # Delete logs while the habit row still exists so the rollup knows their category
+    "trg_habit_delete_logs": """
+        CREATE TRIGGER IF NOT EXISTS trg_habit_delete_logs BEFORE DELETE ON habits BEGIN
+            DELETE FROM daily_logs WHERE habit_id = OLD.habit_id;
+        END""",
+}
+
+
+def create_rollup_triggers(conn, day="day"):
+    for sql in ROLLUP_TRIGGERS.values():
+        conn.execute(sql.format(day=day))
+
+
+def drop_rollup_triggers(conn):
+    """For bulk loads: drop the triggers, load, then rebuild_rollup() and recreate them"""
+    for name in ROLLUP_TRIGGERS:
+        conn.execute("DROP TRIGGER IF EXISTS %s" % name)
+
+
+def rebuild_rollup(conn, day="day"):
+    """Recompute daily_rollup from scratch (repair, or after a bulk load)"""
+    conn.execute("DELETE FROM daily_rollup")
+    conn.execute("""
+        INSERT INTO daily_rollup ({day}, category, completions)
+        SELECT l.{day}, COALESCE(h.category, ''), COUNT(*)
+        FROM daily_logs l LEFT JOIN habits h ON h.habit_id = l.habit_id
+        GROUP BY l.{day}, COALESCE(h.category, '')
+    """.format(day=day))
+
+
+def _create_daily_rollup(conn, day, day_type):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_rollup (
+            {day} {day_type} NOT NULL,
+            category TEXT NOT NULL,
+            completions INTEGER NOT NULL,
+            PRIMARY KEY ({day}, category)
+        ) WITHOUT ROWID
+    """.format(day=day, day_type=day_type))
+
+
+def _daily_rollup(conn):
+    _create_daily_rollup(conn, "log_date", "TEXT")
+    create_rollup_triggers(conn, "log_date")
+    rebuild_rollup(conn, "log_date")
+
+
+# --- COMPLETION COUNTERS ---
+# stats holds app-wide counters (currently 'total_completions') and habit_stats the
+# per-habit totals, so XP and "done N times" are single-row reads instead of COUNT(*).
+STATS_TRIGGERS = {
+    "trg_stats_log_insert": """
+        CREATE TRIGGER IF NOT EXISTS trg_stats_log_insert AFTER INSERT ON daily_logs BEGIN
+            UPDATE stats SET value = value + 1 WHERE key = 'total_completions';
+            INSERT INTO habit_stats (habit_id, completions) VALUES (NEW.habit_id, 1)
+            ON CONFLICT(habit_id) DO UPDATE SET completions = completions + 1;
+        END""",
+    "trg_stats_log_delete": """
+        CREATE TRIGGER IF NOT EXISTS trg_stats_log_delete AFTER DELETE ON daily_logs BEGIN
+            UPDATE stats SET value = value - 1 WHERE key = 'total_completions';
+            UPDATE habit_stats SET completions = completions - 1 WHERE habit_id = OLD.habit_id;
+        END""",
+    "trg_stats_habit_delete": """
+        CREATE TRIGGER IF NOT EXISTS trg_stats_habit_delete AFTER DELETE ON habits BEGIN
+            DELETE FROM habit_stats WHERE habit_id = OLD.habit_id;
+        END""",
+}
+
+
+def create_stats_triggers(conn):
+    for sql in STATS_TRIGGERS.values():
+        conn.execute(sql)
+
+
+def drop_stats_triggers(conn):
+    """For bulk loads, like drop_rollup_triggers(); follow with rebuild_stats()"""
+    for name in STATS_TRIGGERS:
+        conn.execute("DROP TRIGGER IF EXISTS %s" % name)
+
+
+def rebuild_stats(conn):
+    """Recompute the completion counters from daily_logs"""
+    conn.execute("DELETE FROM habit_stats")
+    conn.execute("INSERT INTO habit_stats (habit_id, completions) SELECT habit_id, COUNT(*) FROM daily_logs GROUP BY habit_id")
+    conn.execute("""
+        INSERT INTO stats (key, value) VALUES ('total_completions', (SELECT COUNT(*) FROM daily_logs))
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+    """)
+
+
+def _completion_stats(conn):
+    conn.execute("CREATE TABLE IF NOT EXISTS stats (key TEXT PRIMARY KEY, value INTEGER NOT NULL) WITHOUT ROWID")
+    conn.execute("CREATE TABLE IF NOT EXISTS habit_stats (habit_id INTEGER PRIMARY KEY, completions INTEGER NOT NULL)")
+    create_stats_triggers(conn)
+    rebuild_stats(conn)
+
+
+def _habit_description(conn):
+    # The MySQL CLI schema has always had a description; share it so both tools hold the same data
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(habits)")]
+    if "description" not in columns:
+        conn.execute("ALTER TABLE habits ADD COLUMN description TEXT")
+
+
+def _integer_days(conn):
+    # daily_logs(log_id, habit_id, log_date TEXT) -> daily_logs(habit_id, day INTEGER) keyed by
+    # (habit_id, day) WITHOUT ROWID: no rowid, no separate unique index, 8 bytes or less per date.
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(daily_logs)")]
+    if "day" in columns:
+        return  # already converted
+    # The triggers on habits mention daily_logs, and DROP TABLE removes the ones on it.
+    drop_rollup_triggers(conn)
+    drop_stats_triggers(conn)
+    conn.execute("DROP TABLE IF EXISTS daily_logs_days")  # left over from an interrupted run
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_logs_days (
+            habit_id INTEGER NOT NULL REFERENCES habits(habit_id) ON DELETE CASCADE,
+            day INTEGER NOT NULL,
+            PRIMARY KEY (habit_id, day)
+        ) WITHOUT ROWID
+    """)
+    # date() first so 'YYYY-MM-DD HH:MM' values land on their own day; logs of deleted
+    # habits and unparseable dates are dropped
+    conn.execute("""
+        INSERT OR IGNORE INTO daily_logs_days (habit_id, day)
+        SELECT habit_id, CAST(julianday(date(log_date)) - %s AS INTEGER) FROM daily_logs
+        WHERE julianday(date(log_date)) IS NOT NULL AND habit_id IN (SELECT habit_id FROM habits)
+    """ % JULIAN_EPOCH)
+    conn.execute("DROP TABLE daily_logs")
+    conn.execute("ALTER TABLE daily_logs_days RENAME TO daily_logs")
+    create_log_indexes(conn)
+
+    conn.execute("DROP TABLE IF EXISTS daily_rollup")
+    _create_daily_rollup(conn, "day", "INTEGER")
+    rebuild_rollup(conn)
+    create_rollup_triggers(conn)
+    rebuild_stats(conn)
+    create_stats_triggers(conn)
+
+
+def _log_archive(conn):
+    # Compacted history, one 366-bit bitmap per (habit, year); see archive.py.
+    # completions caches the bitmap's popcount so the counters can be fixed up in SQL.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS log_archive (
+            habit_id INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            bits BLOB NOT NULL,
+            completions INTEGER NOT NULL,
+            PRIMARY KEY (habit_id, year)
+        ) WITHOUT ROWID
+    """)
+    # A deleted habit takes its archived completions out of the total (its daily_rollup
+    # days are removed by Database.delete_habit, which can read the bitmaps)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_archive_habit_delete AFTER DELETE ON habits BEGIN
+            UPDATE stats SET value = value - (SELECT COALESCE(SUM(completions), 0) FROM log_archive
+                                              WHERE habit_id = OLD.habit_id)
+            WHERE key = 'total_completions';
+            DELETE FROM log_archive WHERE habit_id = OLD.habit_id;
+        END""")
+
+
+MIGRATIONS = [
+    (1, "deduplicate daily_logs and add UNIQUE(habit_id, log_date)", _unique_daily_logs),
+    (2, "covering indexes for dashboard and analytics queries", _covering_indexes),
+    (3, "daily_rollup table maintained by triggers", _daily_rollup),
+    (4, "habits.description, shared with the MySQL backend", _habit_description),
+    (5, "stats/habit_stats completion counters maintained by triggers", _completion_stats),
+    (6, "daily_logs/daily_rollup dates as INTEGER epoch days, WITHOUT ROWID", _integer_days),
+    (7, "log_archive: per-(habit, year) completion bitmaps", _log_archive),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Bring the schema up to LATEST_VERSION. Returns the list of versions applied."""
+    applied = []
+    for version, description, apply in MIGRATIONS:
+        if version <= get_version(conn):
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-check under the write lock in case another process migrated first
+            if version > get_version(conn):
+                apply(conn)
+                conn.execute("PRAGMA user_version = %d" % version)
+                applied.append(version)
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+    return applied
@@ -0,0 +1,361 @@
+"""MySQL / MariaDB storage backend (QUESTLOG_BACKEND=mysql).
+
+Shares its schema with database.py so the GUI and tracker.py can use the same
+server. Connections come from a mysql.connector pool; each call borrows one and
+hands it back, so many threads (or users) can work at once.
+
+Unlike the SQLite backend nothing is cached in-process: other clients may be
+writing to the same tables. "Today" is always the client's local date, so a
+server in another time zone doesn't shift anyone's check-ins.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from datetime import date
+
+import mysql.connector
+from mysql.connector import pooling
+
+from storage import WEEK_STARTS, StorageBackend, StorageError, id_batches, streaks_from_islands, week_bounds
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS habits (
+        habit_id INT AUTO_INCREMENT PRIMARY KEY,
+        habit_name VARCHAR(255) NOT NULL,
+        description TEXT,
+        reminder_time VARCHAR(5),
+        category VARCHAR(64) DEFAULT 'General',
+        weekly_target INT DEFAULT 0,
+        KEY idx_habits_category (category, habit_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS daily_logs (
+        log_id INT AUTO_INCREMENT PRIMARY KEY,
+        habit_id INT NOT NULL,
+        log_date DATE NOT NULL,
+        UNIQUE KEY idx_logs_habit_date (habit_id, log_date),
+        KEY idx_logs_date_habit (log_date, habit_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS categories (
+        cat_id INT AUTO_INCREMENT PRIMARY KEY,
+        name VARCHAR(64) UNIQUE,
+        color VARCHAR(16)
+    )""",
+)
+
+# Columns the original CLI schema (habit_name, description) is missing
+HABIT_COLUMNS = {
+    "description": "ALTER TABLE habits ADD COLUMN description TEXT",
+    "reminder_time": "ALTER TABLE habits ADD COLUMN reminder_time VARCHAR(5)",
+    "category": "ALTER TABLE habits ADD COLUMN category VARCHAR(64) DEFAULT 'General'",
+    "weekly_target": "ALTER TABLE habits ADD COLUMN weekly_target INT DEFAULT 0",
+}
+
+LOG_INDEXES = {
+    "idx_logs_habit_date": "ALTER TABLE daily_logs ADD UNIQUE KEY idx_logs_habit_date (habit_id, log_date)",
+    "idx_logs_date_habit": "ALTER TABLE daily_logs ADD KEY idx_logs_date_habit (log_date, habit_id)",
+}
+
+DEFAULT_CATEGORIES = [
+    ("General", "#888888"),
+    ("Health", "#3498db"),
+    ("Work", "#e74c3c"),
+    ("Learning", "#2ecc71"),
+    ("Creative", "#9b59b6"),
+]
+
+
+def mysql_config():
+    """Connection settings from .env (DB_HOST, DB_USER, DB_PASS, DB_NAME)"""
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass  # plain environment variables work too
+    return {
+        "host": os.getenv("DB_HOST"),
+        "user": os.getenv("DB_USER"),
+        "password": os.getenv("DB_PASS"),
+        "database": os.getenv("DB_NAME"),
+    }
+
+
+class MySQLBackend(StorageBackend):
+    cache_snapshots = False  # other clients' writes don't bump our data_version
+
+    def __init__(self, week_start="monday", pool_size=POOL_SIZE, **config):
+        if week_start not in WEEK_STARTS:
+            raise ValueError(f"week_start must be one of {sorted(WEEK_STARTS)}")
+        self.week_start = week_start
+        self.data_version = 0
+        self._local = threading.local()  # connection of the transaction open on this thread
+        try:
+            # autocommit: single reads never hold a snapshot; transaction() opens one explicitly
+            self._pool = pooling.MySQLConnectionPool(pool_name="questlog", pool_size=pool_size, autocommit=True,
+                                                     **(config or mysql_config()))
+        except mysql.connector.Error as e:
+            raise StorageError(f"Could not connect to MySQL: {e}") from e
+        self.init_db()
+
+    # --- CONNECTIONS ---
+    @contextmanager
+    def _connection(self):
+        """This thread's transaction connection, or one borrowed from the pool"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            yield conn
+            return
+        try:
+            conn = self._pool.get_connection()
+        except mysql.connector.Error as e:
+            raise StorageError(f"Could not connect to MySQL: {e}") from e
+        try:
+            yield conn
+        finally:
+            conn.close()  # back to the pool
+
+    @contextmanager
+    def transaction(self):
+        """Group several calls into one transaction. Nested blocks join the outer one."""
+        if getattr(self._local, "conn", None) is not None:
+            yield self._local.conn
+            return
+        with self._connection() as conn:
+            self._local.conn = conn
+            try:
+                conn.start_transaction()
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                self._local.conn = None
+
+    def _rows(self, sql, params=()):
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(sql, params)
+                return cursor.fetchall() if cursor.with_rows else []
+        except mysql.connector.Error as e:
+            raise StorageError(str(e)) from e
+
+    def _write(self, sql, params=()):
+        """Run one statement in its own transaction. Returns (rowcount, lastrowid)."""
+        try:
+            with self.transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute(sql, params)
+                result = (cursor.rowcount, cursor.lastrowid)
+        except mysql.connector.Error as e:
+            raise StorageError(str(e)) from e
+        self.data_version += 1
+        return result
+
+    def close(self):
+        """Pooled connections are closed when the pool is garbage collected"""
+        self._local = threading.local()
+
+    def init_db(self):
+        """Create the schema, or upgrade the CLI's original habits/daily_logs tables in place"""
+        for sql in SCHEMA:
+            self._rows(sql)
+        columns = {row[0].lower() for row in self._rows(
+            "SELECT column_name FROM information_schema.columns WHERE table_schema = DATABASE() AND table_name = 'habits'")}
+        for name, sql in HABIT_COLUMNS.items():
+            if name not in columns: self._rows(sql)
+
+        indexes = {row[0] for row in self._rows(
+            "SELECT DISTINCT index_name FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = 'daily_logs'")}
+        if "idx_logs_habit_date" not in indexes:
+            # Keep the oldest row of every (habit, day) pair before making duplicates impossible
+            self._rows("""DELETE d FROM daily_logs d JOIN daily_logs k
+                          ON k.habit_id = d.habit_id AND k.log_date = d.log_date AND k.log_id < d.log_id""")
+        for name, sql in LOG_INDEXES.items():
+            if name not in indexes: self._rows(sql)
+
+        if self._rows("SELECT COUNT(*) FROM categories")[0][0] == 0:
+            with self.transaction() as conn:
+                conn.cursor().executemany("INSERT INTO categories (name, color) VALUES (%s, %s)", DEFAULT_CATEGORIES)
+
+    # --- CATEGORY MANAGEMENT ---
+    def get_all_categories(self):
+        return [tuple(row) for row in self._rows("SELECT cat_id, name, color FROM categories ORDER BY cat_id")]
+
+    def add_category(self, name, color):
+        try:
+            self._write("INSERT INTO categories (name, color) VALUES (%s, %s)", (name, color))
+        except StorageError:
+            return False
+        return True
+
+    def update_category(self, cat_id, new_name, new_color):
+        try:
+            with self.transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT name FROM categories WHERE cat_id = %s FOR UPDATE", (cat_id,))
+                old_name = cursor.fetchone()[0]
+                cursor.execute("UPDATE categories SET name = %s, color = %s WHERE cat_id = %s", (new_name, new_color, cat_id))
+                cursor.execute("UPDATE habits SET category = %s WHERE category = %s", (new_name, old_name))
+        except (mysql.connector.Error, StorageError, TypeError):
+            return False
+        self.data_version += 1
+        return True
+
+    # --- ANALYTICS DATA ---
+    def get_category_distribution(self):
+        rows = self._rows("""
+            SELECT h.category, COUNT(*), MAX(c.color) FROM habits h
+            LEFT JOIN categories c ON c.name = h.category
+            GROUP BY h.category
+        """)
+        return {cat: {"count": count, "color": color or "#888888"} for cat, count, color in rows}
+
+    def get_category_performance(self):
+        rows = self._rows("""
+            SELECT h.category, MAX(c.color), COUNT(*), COUNT(d.habit_id) FROM habits h
+            LEFT JOIN categories c ON c.name = h.category
+            LEFT JOIN daily_logs d ON d.habit_id = h.habit_id AND d.log_date = %s
+            GROUP BY h.category
+        """, (date.today(),))
+        return {cat: {"total": total, "done": done, "color": color or "#888888"} for cat, color, total, done in rows}
+
+    # --- CORE HABIT FUNCTIONS ---
+    def _habit_rows(self, where="", params=(), limit=None):
+        """Dashboard rows: habits joined with this week's logs in one indexed pass"""
+        today = date.today()
+        week_from, week_to = week_bounds(today, self.week_start)
+        query = """
+        SELECT h.habit_id, h.habit_name, h.reminder_time, h.category, h.weekly_target,
+               COALESCE(MAX(d.log_date = %s), 0), COUNT(d.habit_id)
+        FROM habits h
+        LEFT JOIN daily_logs d ON d.habit_id = h.habit_id AND d.log_date >= %s AND d.log_date < %s
+        """ + where + " GROUP BY h.habit_id ORDER BY h.habit_id"
+        params = [today, week_from, week_to, *params]
+        if limit is not None:
+            query += " LIMIT %s"
+            params.append(limit)
+        return [row[:5] + (int(row[5]), row[6]) for row in self._rows(query, params)]
+
+    def get_habits(self, category_filter=None):
+        if category_filter and category_filter != "All":
+            return self._habit_rows("WHERE h.category = %s", (category_filter,))
+        return self._habit_rows()
+
+    def get_habit(self, habit_id):
+        rows = self._habit_rows("WHERE h.habit_id = %s", (habit_id,))
+        return rows[0] if rows else None
+
+    def get_habits_page(self, after_id=0, limit=50, category_filter=None):
+        if category_filter and category_filter != "All":
+            return self._habit_rows("WHERE h.habit_id > %s AND h.category = %s", (after_id, category_filter), limit)
+        return self._habit_rows("WHERE h.habit_id > %s", (after_id,), limit)
+
+    def get_habit_summary(self, category_filter=None):
+        query = """
+        SELECT COUNT(*), COUNT(d.habit_id) FROM habits h
+        LEFT JOIN daily_logs d ON d.habit_id = h.habit_id AND d.log_date = %s
+        """
+        params = [date.today()]
+        if category_filter and category_filter != "All":
+            query += " WHERE h.category = %s"
+            params.append(category_filter)
+        return tuple(self._rows(query, params)[0])
+
+    def add_habit(self, name, time_str, category, target, description=None):
+        _, habit_id = self._write(
+            "INSERT INTO habits (habit_name, reminder_time, category, weekly_target, description) VALUES (%s, %s, %s, %s, %s)",
+            (name, time_str or None, category, target, description or None))
+        return habit_id
+
+    def update_habit(self, habit_id, name, time_str, category, target):
+        self._write("UPDATE habits SET habit_name = %s, reminder_time = %s, category = %s, weekly_target = %s WHERE habit_id = %s",
+                    (name, time_str or None, category, target, habit_id))
+
+    def delete_habit(self, habit_id):
+        with self.transaction():
+            # Older CLI tables have no ON DELETE CASCADE
+            self._write("DELETE FROM daily_logs WHERE habit_id = %s", (habit_id,))
+            self._write("DELETE FROM habits WHERE habit_id = %s", (habit_id,))
+
+    def toggle_habit(self, habit_id, is_checked):
+        if is_checked:
+            self._write("INSERT IGNORE INTO daily_logs (habit_id, log_date) VALUES (%s, %s)", (habit_id, date.today()))
+        else:
+            self._write("DELETE FROM daily_logs WHERE habit_id = %s AND log_date = %s", (habit_id, date.today()))
+
+    def mark_habits_done(self, habit_ids):
+        habit_ids = sorted(set(habit_ids))
+        if not habit_ids: return 0
+        marked, _ = self._write(
+            "INSERT IGNORE INTO daily_logs (habit_id, log_date) SELECT habit_id, %s FROM habits WHERE habit_id IN (%s)"
+            % ("%s", ", ".join(["%s"] * len(habit_ids))), (date.today(), *habit_ids))
+        return marked
+
+    def reset_data(self):
+        with self.transaction():
+            self._write("DELETE FROM daily_logs")
+            self._write("DELETE FROM habits")
+
+    def get_streaks(self, habit_ids=None):
+        """Same gaps-and-islands pass as the SQLite backend, on TO_DAYS() (MySQL 8 / MariaDB 10.2+)"""
+        query = """
+        SELECT habit_id, MAX(log_date), COUNT(*) FROM (
+            SELECT habit_id, log_date,
+                   TO_DAYS(log_date) - ROW_NUMBER() OVER (PARTITION BY habit_id ORDER BY log_date) AS grp
+            FROM daily_logs {where}
+        ) islands GROUP BY habit_id, grp
+        """
+        if habit_ids is None:
+            rows = self._rows(query.format(where=""))
+        else:
+            habit_ids = list(habit_ids)
+            rows = []
+            for marks, chunk in id_batches(habit_ids, "%s"):
+                rows.extend(self._rows(query.format(where="WHERE habit_id IN (%s)" % marks), chunk))
+        rows = [(h_id, last.toordinal() if last else None, length) for h_id, last, length in rows]
+        return streaks_from_islands(rows, date.today().toordinal(), habit_ids)
+
+    def get_activity_data(self, start=None, end=None):
+        # No rollup table here: (log_date, habit_id) covers the scan
+        query = "SELECT log_date, COUNT(*) FROM daily_logs"
+        params = []
+        if start or end:
+            query += " WHERE log_date BETWEEN %s AND %s"
+            params = [str(start or "1000-01-01"), str(end or "9999-12-31")]
+        return {row[0].isoformat(): row[1] for row in self._rows(query + " GROUP BY log_date", params)}
+
+    def get_log_days(self, start=None):
+        # TO_DAYS('1970-01-01') = 719528, so these match the SQLite backend's day numbers
+        query = "SELECT habit_id, TO_DAYS(log_date) - 719528 FROM daily_logs"
+        if start:
+            return self._rows(query + " WHERE log_date >= %s", (str(start),))
+        return self._rows(query)
+
+    def get_category_activity(self, start, end):
+        data = {}
+        for category, log_date, completions in self._rows("""
+            SELECT COALESCE(h.category, ''), d.log_date, COUNT(*) FROM daily_logs d
+            JOIN habits h ON h.habit_id = d.habit_id
+            WHERE d.log_date BETWEEN %s AND %s
+            GROUP BY COALESCE(h.category, ''), d.log_date
+        """, (str(start), str(end))):
+            data.setdefault(category, {})[log_date.isoformat()] = completions
+        return data
+
+    def get_total_completions(self):
+        # InnoDB answers this from the smallest index; no counter triggers on a shared server
+        return self._rows("SELECT COUNT(*) FROM daily_logs")[0][0]
+
+    def get_habit_completions(self, habit_ids=None):
+        query = "SELECT habit_id, COUNT(*) FROM daily_logs"
+        if habit_ids is None:
+            return dict(self._rows(query + " GROUP BY habit_id"))
+        habit_ids = list(habit_ids)
+        counts = dict.fromkeys(habit_ids, 0)
+        for marks, chunk in id_batches(habit_ids, "%s"):
+            counts.update(self._rows(query + " WHERE habit_id IN (%s) GROUP BY habit_id" % marks, chunk))
+        return counts
@@ -0,0 +1,174 @@
+"""Opt-in timing for Database calls and the SQL they run.
+
+Set QUESTLOG_PROFILE=1 to enable. When it is off nothing is wrapped and plain
+sqlite3 connections are used, so there is no overhead. When on:
+  * every public Database method records calls, total/p95 latency and rows returned
+  * every statement records calls and total/p95 latency
+  * statements slower than QUESTLOG_SLOW_MS (default 50) are kept in a slow-query
+    log together with their EXPLAIN QUERY PLAN
+The report is printed to stderr at exit and shown under Settings > Query Stats.
+"""
+import atexit
+import functools
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+
+ENABLED = os.getenv("QUESTLOG_PROFILE", "").lower() in ("1", "true", "yes", "on")
+SLOW_MS = float(os.getenv("QUESTLOG_SLOW_MS", "50"))
+SAMPLES = 1000    # recent latencies kept per key for percentiles
+SLOW_LOG_SIZE = 200
+
+# Database methods that are plumbing rather than queries
+NOT_PROFILED = {"get_connection", "transaction", "close", "invalidate_cache"}
+
+
+class QueryStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.methods = {}
+        self.statements = {}
+        self.slow = deque(maxlen=SLOW_LOG_SIZE)
+
+    def _record(self, table, key, seconds, rows=0):
+        with self._lock:
+            entry = table.get(key)
+            if entry is None:
+                entry = table[key] = {"calls": 0, "total": 0.0, "rows": 0, "samples": deque(maxlen=SAMPLES)}
+            entry["calls"] += 1
+            entry["total"] += seconds
+            entry["rows"] += rows
+            entry["samples"].append(seconds)
+
+    def record_method(self, name, seconds, rows):
+        self._record(self.methods, name, seconds, rows)
+
+    def record_statement(self, sql, seconds, plan=None):
+        sql = " ".join(sql.split())
+        self._record(self.statements, sql, seconds)
+        if plan is not None:
+            with self._lock:
+                self.slow.append((seconds * 1000, sql, plan))
+
+    def reset(self):
+        with self._lock:
+            self.methods.clear()
+            self.statements.clear()
+            self.slow.clear()
+
+    def _lines(self, table, limit, width):
+        rows = []
+        with self._lock:
+            for key, e in table.items():
+                samples = sorted(e["samples"])
+                p95 = samples[min(int(len(samples) * 0.95), len(samples) - 1)]
+                rows.append((e["total"], key, e["calls"], p95, e["rows"]))
+        rows.sort(reverse=True)
+        lines = [f"{'total ms':>10} {'calls':>7} {'p95 ms':>9} {'rows':>9}  name"]
+        for total, key, calls, p95, n_rows in rows[:limit]:
+            name = key if len(key) <= width else key[:width - 3] + "..."
+            lines.append(f"{total * 1000:10.1f} {calls:7d} {p95 * 1000:9.3f} {n_rows:9d}  {name}")
+        return lines
+
+    def report(self, limit=25):
+        lines = ["== Database methods =="] + self._lines(self.methods, limit, 60)
+        lines += ["", "== SQL statements =="] + self._lines(self.statements, limit, 100)
+        lines += ["", f"== Slow queries (>= {SLOW_MS:g} ms) =="]
+        with self._lock:
+            slow = list(self.slow)
+        for ms, sql, plan in slow[-limit:]:
+            lines.append(f"{ms:9.1f} ms  {sql}")
+            lines.extend(f"             {step}" for step in plan)
+        if not slow: lines.append("(none)")
+        return "\n".join(lines)
+
+
+stats = QueryStats()
+
+
+def _explain(conn, sql, params):
+    if not sql.lstrip().upper().startswith(("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")):
+        return []
+    try:
+        return [row[3] for row in sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, params)]
+    except sqlite3.Error as e:
+        return [f"(no plan: {e})"]
+
+
+def _timed(conn, run, sql, params=None):
+    start = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - start
+    plan = None
+    if elapsed * 1000 >= SLOW_MS:
+        plan = _explain(conn, sql, params) if params is not None else ["(executemany: no plan)"]
+    stats.record_statement(sql, elapsed, plan)
+    return result
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    def execute(self, sql, params=()):
+        return _timed(self.connection, lambda: super(ProfiledCursor, self).execute(sql, params), sql, params)
+
+    def executemany(self, sql, seq):
+        return _timed(self.connection, lambda: super(ProfiledCursor, self).executemany(sql, seq), sql)
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """sqlite3.connect(..., factory=ProfiledConnection) times every statement"""
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq):
+        return self.cursor().executemany(sql, seq)
+
+
+class StartupTimer:
+    """`python main.py --profile-startup`: time between marks during imports and App init"""
+    def __init__(self, enabled, start=None):
+        self.enabled = enabled
+        self.start = self.last = start or time.perf_counter()
+        self.steps = []
+
+    def mark(self, label):
+        if not self.enabled: return
+        now = time.perf_counter()
+        self.steps.append((label, now - self.last))
+        self.last = now
+
+    def report(self):
+        lines = ["== Startup =="]
+        lines += [f"{seconds * 1000:9.1f} ms  {label}" for label, seconds in self.steps]
+        lines.append(f"{(self.last - self.start) * 1000:9.1f} ms  total")
+        return "\n".join(lines)
+
+
+def _count_rows(result):
+    if isinstance(result, (list, dict)): return len(result)
+    return 0 if result is None else 1
+
+
+def instrument(db):
+    """Wrap every public query method of a Database instance with timing"""
+    for name in dir(type(db)):
+        if name.startswith("_") or name in NOT_PROFILED: continue
+        method = getattr(db, name)
+        if not callable(method): continue
+
+        @functools.wraps(method)
+        def timed(*args, _method=method, _name=name, **kwargs):
+            start = time.perf_counter()
+            result = _method(*args, **kwargs)
+            stats.record_method(_name, time.perf_counter() - start, _count_rows(result))
+            return result
+        setattr(db, name, timed)
+
+
+if ENABLED:
+    atexit.register(lambda: print("\n" + stats.report(), file=sys.stderr))
@@ -0,0 +1,80 @@
+import heapq
+import threading
+from datetime import date, datetime, timedelta
+
+LATE_GRACE = timedelta(minutes=5)  # after a suspend/resume, skip reminders older than this
+
+def next_fire_time(remind_time, now):
+    """Next datetime at HH:MM, counting the current minute as still due"""
+    try: hh, mm = (int(p) for p in remind_time.split(":"))
+    except (AttributeError, ValueError): return None
+    fire_at = now.replace(hour=hh, minute=mm, second=0, microsecond=0)
+    if fire_at + timedelta(minutes=1) <= now:
+        fire_at += timedelta(days=1)
+    return fire_at
+
+class ReminderScheduler:
+    """Daily reminders kept in a heap of next-fire times.
+
+    Nothing polls the database: the app reports changes with sync() / update() /
+    remove(), and calls pop_due() on every minute tick (reminder
+    times are HH:MM), which costs one heap peek when nothing is due.
+    """
+    def __init__(self):
+        self._heap = []     # (fire_at, seq, habit_id); entries whose seq is stale are skipped
+        self._habits = {}   # habit_id -> {"name", "time", "done_on", "seq"}
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    # --- CHANGES FROM THE APP ---
+    def sync(self, habits):
+        """Replace everything from get_habits() rows"""
+        with self._lock:
+            self._heap.clear()
+            self._habits.clear()
+            for (h_id, name, remind_time, cat, target, is_done, progress) in habits:
+                self._put(h_id, name, remind_time, is_done)
+
+    def update(self, h_id, name, remind_time, is_done):
+        with self._lock:
+            entry = self._habits.get(h_id)
+            done_on = date.today() if is_done else None
+            if entry and entry["time"] == remind_time and entry["done_on"] == done_on:
+                entry["name"] = name  # renames don't move the reminder
+                return
+            self._put(h_id, name, remind_time, is_done)
+
+    def remove(self, h_id):
+        with self._lock:
+            self._habits.pop(h_id, None)  # its heap entry goes stale
+
+    def _put(self, h_id, name, remind_time, is_done):
+        self._seq += 1
+        self._habits[h_id] = {"name": name, "time": remind_time, "seq": self._seq,
+                              "done_on": date.today() if is_done else None}
+        fire_at = next_fire_time(remind_time, datetime.now()) if remind_time else None
+        if fire_at:
+            heapq.heappush(self._heap, (fire_at, self._seq, h_id))
+
+    # --- HEAP ---
+    def pop_due(self, now):
+        """Pop every reminder due at `now`, reschedule each for tomorrow and
+        return the (habit_id, name) pairs that should notify."""
+        due = []
+        with self._lock:
+            while True:
+                self._drop_stale()
+                if not self._heap or self._heap[0][0] > now: break
+                fire_at, seq, h_id = heapq.heappop(self._heap)
+                entry = self._habits[h_id]
+                if entry["done_on"] != fire_at.date() and now - fire_at <= LATE_GRACE:
+                    due.append((h_id, entry["name"]))
+                heapq.heappush(self._heap, (next_fire_time(entry["time"], fire_at + timedelta(minutes=1)), seq, h_id))
+        return due
+
+    def _drop_stale(self):
+        while self._heap:
+            fire_at, seq, h_id = self._heap[0]
+            entry = self._habits.get(h_id)
+            if entry and entry["seq"] == seq: return
+            heapq.heappop(self._heap)
@@ -1,7 +1,8 @@
 import os
+import queue
 import sys
 import threading
-from playsound import playsound
+import time
 
 # Helper to find files inside the .exe
 def resource_path(relative_path):
@@ -12,10 +13,24 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
+QUEUE_SIZE = 4       # plays waiting at most; further triggers are dropped
+DEBOUNCE_SECONDS = 0.3  # the same sound triggered again within this window plays once
+
 class SoundManager:
+    """Plays sounds one at a time on a single long-lived thread.
+
+    playsound only plays from a file path, so "preloading" means each sound's path
+    is resolved and checked once, on first use, and reused after that.
+    """
     def __init__(self):
         self.enabled = True
         self.is_muted = False  # Added missing mute flag for consistency
+        self._paths = {}       # filename -> absolute path, or None if missing
+        self._last = {}        # filename -> monotonic time it was last queued
+        self._pending = set()  # filenames queued but not yet playing
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._thread = None
 
     def toggle_mute(self):
         self.is_muted = not self.is_muted
@@ -29,16 +44,43 @@ class SoundManager:
         if self.is_muted: return
         self._play("notification.mp3")
 
+    def _path(self, filename):
+        if filename not in self._paths:
+            # Works in .exe and VS Code; checked once instead of on every play
+            file_path = resource_path(os.path.join("sounds", filename))
+            if not os.path.exists(file_path):
+                print(f"⚠️ Sound file not found: {file_path}")
+                file_path = None
+            self._paths[filename] = file_path
+        return self._paths[filename]
+
     def _play(self, filename):
-        # 1. Get the correct path (works in .exe and VS Code)
-        file_path = resource_path(os.path.join("sounds", filename))
-        
-        # 2. Check if file exists to prevent errors
-        if os.path.exists(file_path):
+        """Queue a sound; safe to call from any thread, never blocks"""
+        now = time.monotonic()
+        with self._lock:
+            if self._path(filename) is None: return
+            # Coalesce bursts: skip if the same sound is still waiting or was just queued
+            if filename in self._pending or now - self._last.get(filename, -DEBOUNCE_SECONDS) < DEBOUNCE_SECONDS:
+                return
+            try:
+                self._queue.put_nowait(filename)
+            except queue.Full:
+                return  # already a backlog of sounds; this one would play too late anyway
+            self._pending.add(filename)
+            self._last[filename] = now
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sound-player", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        # Imported on first play: the audio backend is slow to load and not needed to show the window
+        from playsound import playsound
+        while True:
+            filename = self._queue.get()
+            with self._lock:
+                self._pending.discard(filename)
+                file_path = self._paths[filename]
             try:
-                # 3. Threading ensures the app doesn't freeze while playing
-                threading.Thread(target=playsound, args=(file_path,), daemon=True).start()
+                playsound(file_path)  # blocks until done, so sounds never overlap
             except Exception as e:
                 print(f"Error playing sound: {e}")
-        else:
-            print(f"⚠️ Sound file not found: {file_path}")
\ No newline at end of file
@@ -0,0 +1,181 @@
+"""Storage backend interface shared by the GUI (main.py) and the CLI (tracker.py).
+
+Two implementations exist:
+  * database.Database        - local SQLite file (default)
+  * mysql_backend.MySQLBackend - MySQL / MariaDB server, pooled connections
+
+Pick one with open_backend(), which reads QUESTLOG_BACKEND ("sqlite" or "mysql")
+and, for MySQL, the DB_HOST / DB_USER / DB_PASS / DB_NAME settings from .env.
+
+Row shapes every backend returns:
+  categories  -> [(cat_id, name, color)]
+  habit rows  -> [(habit_id, habit_name, reminder_time, category, weekly_target, is_done_today, weekly_progress)]
+  dates       -> 'YYYY-MM-DD' strings (get_log_days: integer day numbers, see to_day)
+"""
+import os
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+ACTIVITY_DAYS = 28  # heatmap window on the analytics page
+EPOCH = date(1970, 1, 1)
+_EPOCH_ORDINAL = EPOCH.toordinal()
+
+
+def to_day(value):
+    """date or 'YYYY-MM-DD' -> integer day number (days since 1970-01-01), as stored in SQLite"""
+    if isinstance(value, str): value = date.fromisoformat(value)
+    return value.toordinal() - _EPOCH_ORDINAL
+
+
+def from_day(day):
+    """Integer day number -> date"""
+    return date.fromordinal(day + _EPOCH_ORDINAL)
+
+
+ID_BATCH_SIZE = 500  # ids per IN (...) list; stays under SQLite's bound-parameter limit
+
+
+def id_batches(ids, placeholder="?"):
+    """Split ids for IN (...) lists: yields (placeholders, chunk), e.g. ("?,?,?", [1, 2, 3]).
+    MySQL passes placeholder="%s"."""
+    ids = list(ids)
+    for i in range(0, len(ids), ID_BATCH_SIZE):
+        chunk = ids[i:i + ID_BATCH_SIZE]
+        yield ",".join([placeholder] * len(chunk)), chunk
+
+
+WEEK_STARTS = {"monday": 0, "sunday": 6}  # date.weekday() of the first day of the week
+
+def week_bounds(day, week_start="monday"):
+    """[start, end) ISO date strings of the week containing `day`."""
+    offset = (day.weekday() - WEEK_STARTS[week_start]) % 7
+    start = day - timedelta(days=offset)
+    return start.isoformat(), (start + timedelta(days=7)).isoformat()
+
+
+class StorageError(Exception):
+    """A backend could not reach or update its store"""
+
+
+@dataclass(frozen=True)
+class AnalyticsSnapshot:
+    """Everything the Analytics and Performance pages show, read in one transaction"""
+    day: date
+    total_done: int     # all-time completions
+    habit_count: int
+    done_today: int
+    activity: dict      # {'YYYY-MM-DD': completions} for the last ACTIVITY_DAYS days
+    distribution: dict  # {category: {"count", "color"}}
+    performance: dict   # {category: {"total", "done", "color"}}, today only
+
+    @property
+    def efficiency(self):
+        """Share of habits done today, in percent"""
+        return int(self.done_today / self.habit_count * 100) if self.habit_count else 0
+
+
+class StorageBackend:
+    """Everything App, the analytics pages and the CLI need from a store.
+
+    data_version is bumped by every write made through this object, so views can
+    skip redraws when it hasn't moved.
+    """
+    data_version = 0
+    cache_snapshots = True  # False where other clients write too (the version only tracks ours)
+    _snapshot = None        # (key, AnalyticsSnapshot)
+
+    # --- LIFECYCLE ---
+    def close(self): raise NotImplementedError
+    def transaction(self): raise NotImplementedError
+    def invalidate_cache(self): self.data_version += 1
+
+    # --- CATEGORIES ---
+    def get_all_categories(self): raise NotImplementedError
+    def add_category(self, name, color): raise NotImplementedError
+    def update_category(self, cat_id, new_name, new_color): raise NotImplementedError
+
+    # --- HABITS ---
+    def get_habits(self, category_filter=None): raise NotImplementedError
+    def get_habit(self, habit_id): raise NotImplementedError
+    def get_habits_page(self, after_id=0, limit=50, category_filter=None): raise NotImplementedError
+    def get_habit_summary(self, category_filter=None): raise NotImplementedError
+    def add_habit(self, name, time_str, category, target, description=None): raise NotImplementedError
+    def update_habit(self, habit_id, name, time_str, category, target): raise NotImplementedError
+    def delete_habit(self, habit_id): raise NotImplementedError
+    def reset_data(self): raise NotImplementedError
+
+    # --- LOGS ---
+    def toggle_habit(self, habit_id, is_checked): raise NotImplementedError
+    def mark_habits_done(self, habit_ids):
+        """Mark many habits done today in one transaction; returns how many were newly marked"""
+        raise NotImplementedError
+    def get_streaks(self, habit_ids=None): raise NotImplementedError
+    def get_streak(self, habit_id):
+        return self.get_streaks([habit_id])[habit_id]["current"]
+    def get_total_completions(self): raise NotImplementedError
+    def get_habit_completions(self, habit_ids=None): raise NotImplementedError
+
+    # --- ANALYTICS ---
+    def get_activity_data(self, start=None, end=None): raise NotImplementedError
+    def get_category_activity(self, start, end): raise NotImplementedError
+    def get_category_distribution(self): raise NotImplementedError
+    def get_category_performance(self): raise NotImplementedError
+    def get_log_days(self, start=None):
+        """Every (habit_id, day number) completion on or after `start`, in one fetch (trends.py)"""
+        raise NotImplementedError
+
+    def get_analytics_snapshot(self):
+        """AnalyticsSnapshot, reused until the next write (or midnight)"""
+        today = date.today()
+        key = (self.data_version, today)  # read before querying: a write meanwhile forces a reload
+        cached = self._snapshot
+        if self.cache_snapshots and cached and cached[0] == key:
+            return cached[1]
+        with self.transaction():
+            # Three reads; distribution and performance are both derived from the habit rows
+            habits = self.get_habits()
+            colors = {row[1]: row[2] for row in self.get_all_categories()}
+            total_done = self.get_total_completions()
+            activity = self.get_activity_data(today - timedelta(days=ACTIVITY_DAYS - 1), today)
+
+        distribution, performance = {}, {}
+        for row in habits:
+            category, is_done = row[3], row[5]
+            color = colors.get(category) or "#888888"
+            distribution.setdefault(category, {"count": 0, "color": color})["count"] += 1
+            perf = performance.setdefault(category, {"total": 0, "done": 0, "color": color})
+            perf["total"] += 1
+            perf["done"] += 1 if is_done else 0
+        snapshot = AnalyticsSnapshot(
+            day=today, total_done=total_done, habit_count=len(habits),
+            done_today=sum(1 for row in habits if row[5]), activity=activity,
+            distribution=distribution,
+            performance=dict(sorted(performance.items(), key=lambda item: item[0] or "")),
+        )
+        self._snapshot = (key, snapshot)
+        return snapshot
+
+
+def streaks_from_islands(rows, today, habit_ids=None):
+    """Fold gaps-and-islands rows (habit_id, last_day, length) into
+    {habit_id: {"current": n, "longest": m}}. Days are integers; `today` likewise."""
+    streaks = {h_id: {"current": 0, "longest": 0} for h_id in habit_ids or ()}
+    for h_id, last_day, length in rows:
+        if last_day is None: continue  # unparseable date
+        entry = streaks.setdefault(h_id, {"current": 0, "longest": 0})
+        if length > entry["longest"]: entry["longest"] = length
+        # A streak is still alive if it ended today or yesterday
+        if last_day >= today - 1: entry["current"] = length
+    return streaks
+
+
+def open_backend(kind=None, **kwargs):
+    """Create the configured backend. kwargs go to its constructor (e.g. week_start)."""
+    kind = (kind or os.getenv("QUESTLOG_BACKEND", "sqlite")).lower()
+    if kind == "sqlite":
+        from database import Database
+        return Database(**kwargs)
+    if kind == "mysql":
+        from mysql_backend import MySQLBackend  # optional dependency: mysql-connector-python
+        return MySQLBackend(**kwargs)
+    raise ValueError(f"Unknown QUESTLOG_BACKEND {kind!r} (expected 'sqlite' or 'mysql')")
@@ -1,94 +1,114 @@
-import mysql.connector
+import sqlite3
 from datetime import date
 import sys
 import os
 from dotenv import load_dotenv
 
+from storage import StorageError, open_backend
+
 # Load the secret variables from .env
 load_dotenv()
 
 # --- 1. CONFIGURATION (SECURE) ---
-DB_CONFIG = {
-    'host': os.getenv('DB_HOST'),
-    'user': os.getenv('DB_USER'),
-    'password': os.getenv('DB_PASS'), # Reads from .env
-    'database': os.getenv('DB_NAME')
-}
-
-def get_connection():
-    """Establishes connection to the local MySQL database."""
+# Same backends as the GUI: MySQL (DB_HOST/DB_USER/DB_PASS/DB_NAME from .env) unless
+# QUESTLOG_BACKEND=sqlite points the CLI at the GUI's local habits.db.
+BACKEND = os.getenv('QUESTLOG_BACKEND', 'mysql')
+_backend = None
+
+def get_backend():
+    """Opens the configured store once (its connections are pooled)."""
+    global _backend
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
-    except mysql.connector.Error as err:
+        if _backend is None:
+            _backend = open_backend(BACKEND)
+        return _backend
+    except (StorageError, sqlite3.Error) as err:
         print(f"\n❌ CONNECTION ERROR: {err}")
         return None
 
 # --- 2. CORE FUNCTIONS ---
 
 def add_new_habit(name, description):
-    conn = get_connection()
-    if conn:
-        cursor = conn.cursor()
-        query = "INSERT INTO habits (habit_name, description) VALUES (%s, %s)"
+    backend = get_backend()
+    if backend:
         try:
-            cursor.execute(query, (name, description))
-            conn.commit()
+            backend.add_habit(name, None, "General", 0, description)
             print(f"\n✅ Success! Added habit: '{name}'")
-        except mysql.connector.Error as err:
+        except (StorageError, sqlite3.Error) as err:
             print(f"Error adding habit: {err}")
-        finally:
-            conn.close()
+
+def mark_habits_done(habit_ids):
+    """Marks many habits done for today in one statement and one transaction.
+    Returns how many were newly marked (already-done and unknown IDs are skipped), or None on error."""
+    backend = get_backend()
+    if not backend:
+        return None
+    try:
+        return backend.mark_habits_done(habit_ids)
+    except (StorageError, sqlite3.Error) as err:
+        print(f"Error: {err}")
+        return None
 
 def mark_habit_done(habit_id):
-    conn = get_connection()
-    if conn:
-        cursor = conn.cursor()
-        today = date.today()
-        
-        check_query = "SELECT * FROM daily_logs WHERE habit_id = %s AND log_date = %s"
-        cursor.execute(check_query, (habit_id, today))
-        
-        if cursor.fetchone():
-            print("\n⚠️  You already marked this as done today!")
-        else:
-            query = "INSERT INTO daily_logs (habit_id, log_date) VALUES (%s, %s)"
-            try:
-                cursor.execute(query, (habit_id, today))
-                conn.commit()
-                print("\n🔥 Great job! Habit marked as completed.")
-            except mysql.connector.Error as err:
-                print(f"Error: {err}")
-        conn.close()
+    marked = mark_habits_done([habit_id])
+    if marked:
+        print("\n🔥 Great job! Habit marked as completed.")
+    elif marked == 0:
+        print("\n⚠️  Already marked as done today (or no habit with that ID).")
 
 def view_daily_progress():
-    conn = get_connection()
-    if conn:
-        cursor = conn.cursor()
+    backend = get_backend()
+    if backend:
         print("\n--- 📅 TODAY'S CHECKLIST ---")
-        
-        today = date.today()
-        query = """
-        SELECT h.habit_id, h.habit_name, 
-               CASE WHEN d.log_id IS NOT NULL THEN '[X]' ELSE '[ ]' END as status
-        FROM habits h
-        LEFT JOIN daily_logs d ON h.habit_id = d.habit_id AND d.log_date = %s
-        """
-        cursor.execute(query, (today,))
-        
-        results = cursor.fetchall()
+        try:
+            results = backend.get_habits()
+        except (StorageError, sqlite3.Error) as err:
+            print(f"Error: {err}")
+            return
         if not results:
             print("(No habits found. Add one first!)")
-        
-        for (hid, name, status) in results:
+
+        for (hid, name, _time, _category, _target, is_done, _progress) in results:
+            status = '[X]' if is_done else '[ ]'
             print(f"{hid}. {status} {name}")
-            
-        conn.close()
 
-# --- 3. MAIN MENU ---
+# --- 3. BATCH MODE ---
+
+def parse_ids(tokens):
+    """'3 5,8' -> [3, 5, 8]; anything that isn't a number is reported and skipped."""
+    ids = []
+    for token in " ".join(tokens).replace(",", " ").split():
+        if token.isdigit():
+            ids.append(int(token))
+        else:
+            print(f"Skipping invalid habit ID: {token}", file=sys.stderr)
+    return ids
+
+def run_batch(args):
+    """Non-interactive use, e.g. from cron:
+        python tracker.py done 3 5 8
+        echo "3 5 8" | python tracker.py done -
+    """
+    if args[0] != "done":
+        print("Usage: tracker.py done <id> [<id> ...]   (or '-' to read IDs from stdin)", file=sys.stderr)
+        return 2
+    tokens = args[1:]
+    if not tokens or tokens == ["-"]:
+        tokens = sys.stdin.read().split()
+    ids = parse_ids(tokens)
+    marked = mark_habits_done(ids)
+    if marked is None:
+        return 1
+    print(f"Marked {marked} of {len(set(ids))} habit(s) done for {date.today()}.")
+    return 0
+
+# --- 4. MAIN MENU ---
 
 def main():
-    if get_connection() is None:
+    if len(sys.argv) > 1:
+        sys.exit(run_batch(sys.argv[1:]))
+
+    if get_backend() is None:
         print("Could not connect to database. Check your .env file.")
         sys.exit()
 
@@ -0,0 +1,198 @@
+"""Streaming import/export of categories, habits and daily logs (CSV or JSONL).
+
+Exports stream straight from a cursor, and imports read lazily and insert in
+chunks inside one transaction, so neither side ever holds a whole table in memory.
+
+    python transfer.py export logs -o logs.csv
+    python transfer.py export habits -f jsonl            # to stdout
+    python transfer.py import logs logs.csv --defer-indexes
+    cat habits.jsonl | python transfer.py import habits - -f jsonl
+"""
+import csv
+import heapq
+import json
+import sys
+from itertools import islice
+
+import archive
+import migrations
+from database import Database
+from storage import to_day
+
+CHUNK_SIZE = 10000
+
+TABLES = {
+    "categories": ("cat_id", "name", "color"),
+    "habits": ("habit_id", "habit_name", "reminder_time", "category", "weekly_target", "description"),
+    "logs": ("habit_id", "log_date"),
+}
+
+EXPORT_QUERIES = {
+    "categories": "SELECT cat_id, name, color FROM categories ORDER BY cat_id",
+    "habits": "SELECT habit_id, habit_name, reminder_time, category, weekly_target, description FROM habits ORDER BY habit_id",
+    # Dates are stored as day numbers; files always carry ISO dates
+    "logs": "SELECT habit_id, date(day + %s) FROM daily_logs ORDER BY habit_id, day" % migrations.JULIAN_EPOCH,
+}
+
+IMPORT_QUERIES = {
+    # Categories are matched by name; an existing one just takes the imported colour
+    "categories": """INSERT INTO categories (name, color) VALUES (?, ?)
+                     ON CONFLICT(name) DO UPDATE SET color = excluded.color""",
+    # Upsert rather than REPLACE: a REPLACE deletes the row, and with it the habit's logs.
+    # Files from before the description column leave existing descriptions alone.
+    "habits": """INSERT INTO habits (habit_id, habit_name, reminder_time, category, weekly_target, description)
+                 VALUES (?, ?, ?, ?, ?, ?)
+                 ON CONFLICT(habit_id) DO UPDATE SET habit_name = excluded.habit_name,
+                     reminder_time = excluded.reminder_time, category = excluded.category,
+                     weekly_target = excluded.weekly_target,
+                     description = COALESCE(excluded.description, habits.description)""",
+    # Duplicates and logs for unknown habits are skipped instead of aborting the import
+    "logs": """INSERT OR IGNORE INTO daily_logs (habit_id, day)
+               SELECT ?, ? WHERE EXISTS (SELECT 1 FROM habits WHERE habit_id = ?)""",
+}
+
+
+# --- EXPORT ---
+def iter_rows(db, table, chunk_size=CHUNK_SIZE):
+    """Yield rows of `table` without materialising the result set"""
+    conn = db.get_connection()
+    rows = _fetch(conn.execute(EXPORT_QUERIES[table]), chunk_size)
+    if table == "logs":
+        # Compacted history comes from log_archive; both streams are in (habit_id, date) order
+        rows = heapq.merge(archive.iter_logs(conn), rows)
+    yield from rows
+
+
+def _fetch(cursor, chunk_size):
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows: return
+        yield from rows
+
+
+def write_rows(rows, columns, out, fmt):
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(out)
+        writer.writerow(columns)
+        for count, row in enumerate(rows, 1):
+            writer.writerow(row)
+    else:
+        for count, row in enumerate(rows, 1):
+            out.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+            out.write("\n")
+    return count
+
+
+def export_table(db, table, out, fmt="csv"):
+    """Stream one table to a text file object. Returns the number of rows written."""
+    return write_rows(iter_rows(db, table), TABLES[table], out, fmt)
+
+
+# --- IMPORT ---
+def read_rows(src, table, fmt="csv"):
+    """Lazily parse a CSV (with header) or JSONL file into tuples in TABLES[table] order"""
+    columns = TABLES[table]
+    if fmt == "csv":
+        records = csv.DictReader(src)
+    else:
+        records = (json.loads(line) for line in src if line.strip())
+    for record in records:
+        yield tuple(record.get(col) for col in columns)
+
+
+def _clean(table, row):
+    """Normalise one parsed row into the parameters of IMPORT_QUERIES[table]"""
+    if table == "categories":
+        return (row[1], row[2])
+    if table == "habits":
+        h_id, name, time_str, category, target, description = row  # description: None in older files
+        return (int(h_id), name, time_str or None, category or "General", int(target or 0), description or None)
+    h_id = int(row[0])
+    return (h_id, to_day(str(row[1])), h_id)
+
+
+def import_rows(db, table, rows, chunk_size=CHUNK_SIZE, defer_indexes=False):
+    """Insert rows (tuples in TABLES[table] order) in chunks within a single transaction.
+
+    defer_indexes drops the secondary log index and the rollup/stats triggers for the
+    duration of the load and rebuilds them once at the end - much faster for big
+    imports, slower for small ones. Returns (rows read, rows inserted).
+    """
+    rows = (_clean(table, row) for row in rows)
+    read = 0
+    with db.transaction() as conn:
+        deferring = defer_indexes and table == "logs"
+        if deferring:
+            migrations.drop_log_indexes(conn)
+            migrations.drop_rollup_triggers(conn)
+            migrations.drop_stats_triggers(conn)
+        inserted = 0
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk: break
+            inserted += conn.executemany(IMPORT_QUERIES[table], chunk).rowcount
+            read += len(chunk)
+        if deferring:
+            migrations.create_log_indexes(conn)
+            archive.rebuild_rollup(conn)
+            migrations.create_rollup_triggers(conn)
+            archive.rebuild_stats(conn)
+            migrations.create_stats_triggers(conn)
+        if table != "categories" and archive.has_rows(conn):
+            if table == "logs":
+                # Logs for archived years go back into the bitmaps; days already there aren't new
+                inserted -= archive.refold(conn)
+            else:
+                archive.rebuild_rollup(conn)  # category changes of archived habits
+    db.invalidate_cache()
+    return read, inserted
+
+
+def import_table(db, table, src, fmt="csv", **kwargs):
+    return import_rows(db, table, read_rows(src, table, fmt), **kwargs)
+
+
+def _guess_format(path, fmt):
+    if fmt: return fmt
+    return "jsonl" if path and path.endswith((".jsonl", ".json")) else "csv"
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Bulk import/export for QuestLog")
+    parser.add_argument("--db", default="habits.db", help="path to the SQLite file (default: habits.db)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export", help="write a table to a file or stdout")
+    exp.add_argument("table", choices=list(TABLES))
+    exp.add_argument("-o", "--output", help="output file (default: stdout)")
+    exp.add_argument("-f", "--format", choices=["csv", "jsonl"])
+
+    imp = sub.add_parser("import", help="load a table from a file or stdin")
+    imp.add_argument("table", choices=list(TABLES))
+    imp.add_argument("input", help="input file, or - for stdin")
+    imp.add_argument("-f", "--format", choices=["csv", "jsonl"])
+    imp.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    imp.add_argument("--defer-indexes", action="store_true",
+                     help="drop log indexes/triggers during the load and rebuild once (large imports)")
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    if args.command == "export":
+        fmt = _guess_format(args.output, args.format)
+        out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+        try: count = export_table(db, args.table, out, fmt)
+        finally:
+            if out is not sys.stdout: out.close()
+        print(f"Exported {count} {args.table} rows.", file=sys.stderr)
+    else:
+        fmt = _guess_format(args.input, args.format)
+        src = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+        try:
+            read, inserted = import_table(db, args.table, src, fmt,
+                                          chunk_size=args.chunk_size, defer_indexes=args.defer_indexes)
+        finally:
+            if src is not sys.stdin: src.close()
+        print(f"Read {read} {args.table} rows, {inserted} inserted/updated.", file=sys.stderr)
+    db.close()
@@ -0,0 +1,214 @@
+"""Long-range trend analytics, vectorized with NumPy.
+
+All of a store's history is fetched once and laid out as a dense boolean
+habit x day matrix; every statistic below is whole-array arithmetic on it.
+A habit counts as "active" from the day of its first completion, so new
+habits aren't punished for the years before they existed.
+
+    from storage import open_backend
+    import trends
+    m = trends.load_matrix(open_backend())
+    trends.current_rates(m)[30]      # per-habit 30-day completion rate
+    trends.weekly_attainment(m)      # share of finished weeks that met weekly_target
+    trends.report(db)                # everything the Trends page shows (cached)
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import numpy as np
+
+from storage import EPOCH, WEEK_STARTS
+
+WINDOWS = (7, 30, 90)
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+_report_cache = {}  # id(db) -> (key, report)
+
+
+@dataclass
+class HabitMatrix:
+    habit_ids: np.ndarray   # [H], ascending
+    names: list             # [H]
+    categories: list        # [H]
+    targets: np.ndarray     # [H] weekly_target (0 = daily)
+    start: date             # day of column 0; the last column is today
+    done: np.ndarray        # [H, D] bool
+    first: np.ndarray       # [H] column of each habit's first completion (D if none)
+
+    @property
+    def days(self):
+        return self.done.shape[1]
+
+    def active(self):
+        """[H, D] bool: on or after the habit's first completion"""
+        return np.arange(self.days) >= self.first[:, None]
+
+    def weekdays(self):
+        """[D] weekday of every column, Monday = 0"""
+        return (self.start.weekday() + np.arange(self.days)) % 7
+
+
+# --- LOADING ---
+def load_matrix(db, since=None, today=None):
+    """One bulk fetch of every completion (optionally from `since`) into a HabitMatrix"""
+    today = today or date.today()
+    habits = db.get_habits()
+    habit_ids = np.array([row[0] for row in habits], dtype=np.int64)
+    order = np.argsort(habit_ids)
+    habit_ids = habit_ids[order]
+    names = [habits[i][1] for i in order]
+    categories = [habits[i][3] for i in order]
+    targets = np.array([habits[i][4] or 0 for i in order], dtype=np.int64)
+
+    logs = db.get_log_days(since)
+    log_habits = np.fromiter((row[0] for row in logs), dtype=np.int64, count=len(logs))
+    log_days = np.fromiter((row[1] for row in logs), dtype=np.int64, count=len(logs))  # days since 1970
+
+    today_n = (today - EPOCH).days
+    first_n = (since - EPOCH).days if since else int(log_days.min()) if len(logs) else today_n
+    first_n = min(first_n, today_n)
+    n_days = today_n - first_n + 1
+
+    # Map habit ids to rows; drop logs of unknown habits and outside [start, today]
+    rows = np.searchsorted(habit_ids, log_habits).clip(0, max(len(habit_ids) - 1, 0))
+    cols = log_days - first_n
+    keep = (cols >= 0) & (cols < n_days)
+    if len(habit_ids):
+        keep &= habit_ids[rows] == log_habits
+    else:
+        keep[:] = False
+
+    done = np.zeros((len(habit_ids), n_days), dtype=bool)
+    done[rows[keep], cols[keep]] = True
+    first = np.where(done.any(axis=1), done.argmax(axis=1), n_days)
+    return HabitMatrix(habit_ids, names, categories, targets, EPOCH + timedelta(days=first_n), done, first)
+
+
+# --- STATISTICS ---
+def _rate(hits, possible):
+    """hits / possible, NaN where nothing was possible"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(possible > 0, hits / np.maximum(possible, 1), np.nan)
+
+
+def _trailing_sums(values, window):
+    """[H, D] sum over the trailing `window` columns, via one cumulative sum"""
+    csum = np.zeros((values.shape[0], values.shape[1] + 1), dtype=np.int64)
+    np.cumsum(values, axis=1, out=csum[:, 1:])
+    lag = np.maximum(np.arange(values.shape[1]) + 1 - window, 0)
+    return csum[:, 1:] - csum[:, lag]
+
+
+def rolling_rates(m, window):
+    """[H, D] completion rate over the trailing `window` days at every day (NaN before the first)"""
+    return _rate(_trailing_sums(m.done, window), _trailing_sums(m.active(), window))
+
+
+def current_rates(m, windows=WINDOWS):
+    """{window: [H] completion rate over the last `window` days}"""
+    active = m.active()
+    return {w: _rate(m.done[:, -w:].sum(axis=1), active[:, -w:].sum(axis=1)) for w in windows}
+
+
+def category_rates(m, windows=WINDOWS):
+    """{category: {window: rate}} pooling every habit of the category"""
+    names = sorted(set(m.categories), key=lambda c: c or "")
+    index = {c: i for i, c in enumerate(names)}
+    onehot = np.zeros((len(names), len(m.categories)), dtype=np.int64)
+    onehot[[index[c] for c in m.categories], np.arange(len(m.categories))] = 1
+    active = m.active()
+    result = {c: {} for c in names}
+    for w in windows:
+        rates = _rate(onehot @ m.done[:, -w:].sum(axis=1), onehot @ active[:, -w:].sum(axis=1))
+        for c, rate in zip(names, rates):
+            result[c][w] = rate
+    return result
+
+
+def weekly_attainment(m, week_start="monday"):
+    """[H] share of finished weeks in which the habit met its weekly_target.
+
+    Daily habits (target 0) need all 7 days. The current week is still running and is
+    skipped, as are weeks that began before the habit's first completion.
+    """
+    offset = (m.start.weekday() - WEEK_STARTS[week_start]) % 7
+    padded = np.concatenate([np.zeros((len(m.habit_ids), offset), dtype=bool), m.done], axis=1)
+    n_weeks = (padded.shape[1] - 1) // 7  # weeks before the one containing today
+    counts = padded[:, :n_weeks * 7].reshape(len(m.habit_ids), n_weeks, 7).sum(axis=2)
+    week_first_col = np.arange(n_weeks) * 7 - offset
+    eligible = week_first_col >= m.first[:, None]
+    target = np.where(m.targets > 0, m.targets, 7)
+    met = (counts >= target[:, None]) & eligible
+    return _rate(met.sum(axis=1), eligible.sum(axis=1))
+
+
+def weekday_counts(m):
+    """([H, 7] completions, [H, 7] active days) per weekday, Monday first.
+
+    Column masks on the bool matrix rather than an int matmul, so no [H, D] int copy is
+    made; active days come from a per-weekday suffix count indexed at each habit's first day.
+    """
+    weekdays = m.weekdays()
+    done = np.empty((len(m.habit_ids), 7), dtype=np.int64)
+    active = np.empty_like(done)
+    for k in range(7):
+        is_k = weekdays == k
+        done[:, k] = m.done[:, is_k].sum(axis=1)
+        remaining = np.append(np.cumsum(is_k[::-1])[::-1], 0)  # [D + 1] weekday-k columns from c on
+        active[:, k] = remaining[m.first]
+    return done, active
+
+
+def weekday_rates(m):
+    """[H, 7] completion rate per weekday (Monday first) over each habit's active history"""
+    return _rate(*weekday_counts(m))
+
+
+def best_and_worst_weekday(rates):
+    """Index of the best and worst weekday per row of weekday_rates().
+    -1 if there is no data, and worst is -1 too when every weekday is equal."""
+    has_data = ~np.isnan(rates).all(axis=1)
+    filled_hi = np.where(np.isnan(rates), -np.inf, rates)
+    filled_lo = np.where(np.isnan(rates), np.inf, rates)
+    best, worst = filled_hi.argmax(axis=1), filled_lo.argmin(axis=1)
+    uneven = filled_hi.max(axis=1) > filled_lo.min(axis=1)
+    return np.where(has_data, best, -1), np.where(has_data & uneven, worst, -1)
+
+
+# --- PAGE DATA ---
+def report(db, week_start=None):
+    """Everything the Trends page shows, cached until the next write (or midnight)"""
+    week_start = week_start or getattr(db, "week_start", "monday")
+    key = (db.data_version, date.today(), week_start)
+    cached = _report_cache.get(id(db))
+    if getattr(db, "cache_snapshots", False) and cached and cached[0] == key:
+        return cached[1]
+
+    m = load_matrix(db)
+    rates = current_rates(m)
+    attainment = weekly_attainment(m, week_start)
+    weekday_done, weekday_active = weekday_counts(m)
+    best, worst = best_and_worst_weekday(_rate(weekday_done, weekday_active))
+
+    habits = []
+    for i, h_id in enumerate(m.habit_ids.tolist()):
+        habits.append({
+            "habit_id": h_id, "name": m.names[i], "category": m.categories[i],
+            "rates": {w: _float(rates[w][i]) for w in WINDOWS},
+            "attainment": _float(attainment[i]),
+            "best_day": WEEKDAYS[best[i]] if best[i] >= 0 else None,
+            "worst_day": WEEKDAYS[worst[i]] if worst[i] >= 0 else None,
+        })
+    data = {
+        "since": m.start,
+        "days": m.days,
+        "habits": habits,
+        "categories": {c: {w: _float(r) for w, r in by_w.items()} for c, by_w in category_rates(m).items()},
+        "weekdays": [_float(r) for r in _rate(weekday_done.sum(axis=0), weekday_active.sum(axis=0))],  # all habits pooled
+    }
+    _report_cache[id(db)] = (key, data)
+    return data
+
+
+def _float(value):
+    return None if np.isnan(value) else float(value)